@@ -1,5 +1,9 @@
+import json
+from typing import Optional
+from datetime import datetime
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from app.schemas.attendance import (
     CheckInRequest,
     CheckInResponse,
@@ -7,7 +11,11 @@ from app.schemas.attendance import (
     LateCheckInResponse,
     AttendanceResponse,
     ApprovalRequest,
-    ApprovalResponse
+    ApprovalResponse,
+    ApprovalEventResponse,
+    SyncBatchRequest,
+    SyncBatchResponse,
+    SyncItemResult
 )
 from app.services.attendance_service import (
     check_in,
@@ -16,7 +24,13 @@ from app.services.attendance_service import (
     get_user_attendance_history,
     get_pending_approvals
 )
+from app.services.sync_service import process_sync_batch
+from app.services.workflow_service import get_request_audit_trail, review_scope
+from app.core.security import verify_sync_signature
 from app.db.session import get_db
+from app.core.config import settings
+from app.core.events import Event, get_event_bus, team_channel, tenant_namespace
+from app.core.http_cache import pending_version_key, user_version_key, versioned_json_response
 from app.api.dependencies import get_current_user, get_current_team_lead
 from app.models.user import User
 
@@ -82,15 +96,40 @@ def approve_request(
             detail=f"Approval failed: {str(e)}"
         )
 
-@router.get("/history", response_model=list[AttendanceResponse])
-def get_history(
+async def read_raw_body(request: Request) -> bytes:
+    return await request.body()
+
+@router.post("/sync", response_model=SyncBatchResponse)
+def sync(
+    payload: SyncBatchRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
-    limit: int = 30
+    raw_body: bytes = Depends(read_raw_body),
+    signature: Optional[str] = Header(None, alias="X-Sync-Signature")
 ):
-    """Get user's attendance history"""
-    records = get_user_attendance_history(db, current_user.id, limit)
-    return [AttendanceResponse(**{
+    """
+    Apply check-ins and late requests queued on the device while offline, in one request
+    and one transaction. `X-Sync-Signature` is the hex HMAC-SHA256 of the raw body keyed
+    with the `sync_key` returned at login. Returns one result per item, in request order.
+    """
+    if not verify_sync_signature(current_user.id, raw_body, signature):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid sync batch signature"
+        )
+    try:
+        results = process_sync_batch(db, current_user, payload.sent_at, payload.items)
+        return SyncBatchResponse(results=[SyncItemResult(**r) for r in results])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Sync failed: {str(e)}"
+        )
+
+def _attendance_response(r) -> AttendanceResponse:
+    return AttendanceResponse(**{
         "id": r.id,
         "user_id": r.user_id,
         "status": r.status,
@@ -99,28 +138,104 @@ def get_history(
         "distance_from_home": r.distance_from_home,
         "is_late_request": r.is_late_request,
         "late_request_reason": r.late_request_reason,
+        "request_state": r.request_state,
         "approved_by": r.approved_by,
         "approved_at": r.approved_at,
         "created_at": r.created_at
-    }) for r in records]
+    })
+
+@router.get("/history", response_model=list[AttendanceResponse])
+def get_history(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    limit: int = 30,
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None
+):
+    """
+    Get user's attendance history. For the next page pass the last row's
+    created_at as `before` and its id as `before_id`
+    """
+    user_id = current_user.id
+    return versioned_json_response(
+        request,
+        resource=f"history:{user_id}:{limit}:{before.isoformat() if before else ''}:{before_id or ''}",
+        version_key=user_version_key(user_id),
+        build=lambda: [
+            _attendance_response(r)
+            for r in get_user_attendance_history(db, user_id, limit, before, before_id)
+        ]
+    )
 
 @router.get("/pending-approvals", response_model=list[AttendanceResponse])
 def get_pending(
+    request: Request,
     team_lead: User = Depends(get_current_team_lead),
     db: Session = Depends(get_db)
 ):
-    """Get all pending late check-in requests (Team Lead only)"""
-    records = get_pending_approvals(db)
-    return [AttendanceResponse(**{
-        "id": r.id,
-        "user_id": r.user_id,
-        "status": r.status,
-        "latitude": r.latitude,
-        "longitude": r.longitude,
-        "distance_from_home": r.distance_from_home,
-        "is_late_request": r.is_late_request,
-        "late_request_reason": r.late_request_reason,
-        "approved_by": r.approved_by,
-        "approved_at": r.approved_at,
-        "created_at": r.created_at
-    }) for r in records]
+    """Get pending late check-in requests for the lead's team, or all for admins (Team Lead only)"""
+    team = review_scope(team_lead)
+    return versioned_json_response(
+        request,
+        resource=f"pending:{team or '*'}",
+        version_key=pending_version_key(team),
+        build=lambda: [_attendance_response(r) for r in get_pending_approvals(db, team)]
+    )
+
+@router.get("/requests/{attendance_id}/audit", response_model=list[ApprovalEventResponse])
+def get_request_audit(
+    attendance_id: int,
+    team_lead: User = Depends(get_current_team_lead),
+    db: Session = Depends(get_db)
+):
+    """State changes of a late check-in request, oldest first (Team Lead of the employee's team or admin)"""
+    return [ApprovalEventResponse.model_validate(e) for e in get_request_audit_trail(db, team_lead, attendance_id)]
+
+def _format_sse(event: Event) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    team_lead: User = Depends(get_current_team_lead),
+    db: Session = Depends(get_db),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-sent event stream of check-ins, late requests and approvals (Team Lead only).
+    Team leads get their team's channel; admins get all of their tenant's channels.
+    A `reset` event means events were missed: reload /pending-approvals and keep listening.
+    """
+    team = review_scope(team_lead)
+    channels = [team_channel(team)] if team else None
+    # Release the pooled connection now; the stream can stay open for hours
+    db.close()
+
+    subscription, replay = get_event_bus().subscribe(channels, last_event_id, tenant_namespace())
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            if replay is None:
+                yield "event: reset\ndata: {}\n\n"
+            else:
+                for event in replay:
+                    yield _format_sse(event)
+
+            while not subscription.closed:
+                event = await subscription.get(settings.EVENT_STREAM_KEEPALIVE_SECONDS)
+                if await request.is_disconnected():
+                    break
+                yield _format_sse(event) if event else ": keepalive\n\n"
+
+            if subscription.overflowed:
+                yield "event: reset\ndata: {}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,8 +1,11 @@
+from typing import Optional
 from app.models.user import User
 from app.db.session import get_db
 from sqlalchemy.orm import Session
-from app.core.security import create_access_token
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.core.tenancy import current_tenant_id
+from app.core.security import create_access_token, derive_sync_key
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from app.core.http_cache import conditional_json_response
 from app.api.dependencies import get_current_user, get_current_admin
 from app.schemas.auth import (
     LoginRequest, 
@@ -12,13 +15,17 @@ from app.schemas.auth import (
     PasswordResetRequest,
     PasswordResetConfirm,
     PasswordResetResponse,
-    UserResponse
+    UserResponse,
+    UserDirectoryPage,
+    TeamAssignment
 )
 from app.services.auth_service import (
     authenticate, 
     register_user, 
     request_password_reset, 
-    reset_password
+    reset_password,
+    list_users,
+    assign_team
 )
 
 router = APIRouter()
@@ -60,7 +67,12 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
     
     # Create access token
     access_token = create_access_token(
-        data={"sub": str(user.id), "office_id": user.office_id, "role": user.role}
+        data={
+            "sub": str(user.id),
+            "office_id": user.office_id,
+            "role": user.role,
+            "tenant": current_tenant_id()
+        }
     )
     
     return LoginResponse(
@@ -68,7 +80,8 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
         token_type="bearer",
         user_id=user.id,
         office_id=user.office_id,
-        role=user.role
+        role=user.role,
+        sync_key=derive_sync_key(user.id)
     )
 
 @router.post("/password-reset-request", response_model=PasswordResetResponse)
@@ -92,31 +105,58 @@ def password_reset(payload: PasswordResetConfirm, db: Session = Depends(get_db))
         )
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
-    """Get current authenticated user information"""
-    return UserResponse(
+def get_current_user_info(request: Request, current_user: User = Depends(get_current_user)):
+    """Get current authenticated user information (supports If-None-Match)"""
+    return conditional_json_response(request, UserResponse(
         id=current_user.id,
         office_id=current_user.office_id,
         email=current_user.email,
         role=current_user.role,
+        team=current_user.team,
         home_latitude=current_user.home_latitude,
         home_longitude=current_user.home_longitude,
         allowed_radius_m=current_user.allowed_radius_m
-    )
+    ))
 
-@router.get("/users", response_model=list[UserResponse])
+@router.get("/users", response_model=UserDirectoryPage)
 def get_all_users(
+    request: Request,
+    admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    team: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """
+    User directory (Admin only), paged by `cursor` (the previous page's next_cursor).
+    Filter by role, is_active, team; `q` is a prefix search on office ID or email;
+    `fields` is a comma-separated subset of user fields. Supports If-None-Match.
+    """
+    items, next_cursor = list_users(
+        db,
+        limit=limit,
+        cursor=cursor,
+        role=role,
+        is_active=is_active,
+        team=team,
+        search=q,
+        fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    )
+    return conditional_json_response(
+        request,
+        UserDirectoryPage(items=items, next_cursor=next_cursor)
+    )
+
+@router.put("/users/{user_id}/team", response_model=UserResponse)
+def set_user_team(
+    user_id: int,
+    payload: TeamAssignment,
     admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Get all users (Admin only)"""
-    users = db.query(User).all()
-    return [UserResponse(
-        id=user.id,
-        office_id=user.office_id,
-        email=user.email,
-        role=user.role,
-        home_latitude=user.home_latitude,
-        home_longitude=user.home_longitude,
-        allowed_radius_m=user.allowed_radius_m
-    ) for user in users]
+    """Assign a user to a team, which decides who reviews their late requests (Admin only)"""
+    return assign_team(db, user_id, payload.team)
@@ -2,6 +2,7 @@ from app.models.user import User
 from app.db.session import get_db
 from sqlalchemy.orm import Session
 from app.core.security import verify_token
+from app.core.tenancy import DEFAULT_TENANT_ID, current_tenant_id
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -23,7 +24,8 @@ def get_current_user(
         )
     
     user_id: int = payload.get("sub")
-    if user_id is None:
+    # A token is only valid for the tenant that issued it; user ids overlap across tenants
+    if user_id is None or payload.get("tenant", DEFAULT_TENANT_ID) != current_tenant_id():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
@@ -0,0 +1,17 @@
+from app.models.user import User
+from app.db.session import get_db
+from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends
+from app.api.dependencies import get_current_admin
+from app.schemas.jobs import JobMetricsResponse
+from app.services.job_queue import get_queue_metrics
+
+router = APIRouter()
+
+@router.get("/metrics", response_model=JobMetricsResponse)
+def job_metrics(
+    admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Background job queue depth, lag and throughput (Admin only)"""
+    return JobMetricsResponse(**get_queue_metrics(db))
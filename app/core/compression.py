@@ -0,0 +1,94 @@
+import re
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only without it
+    brotli = None
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+def _accepts(accept_encoding: str, encoding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == encoding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+# A strong ETag names one exact representation, so compressed bodies get the
+# coding appended to their tag ("abc" -> "abc-gzip"), as Apache does
+ENCODED_ETAG = re.compile(r'-(br|gzip)"$')
+
+def _strip_etag_encodings(if_none_match: str) -> "tuple[str, str]":
+    """If-None-Match with our coding suffixes removed, and the suffix that was seen"""
+    seen = ""
+    tags = []
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        match = ENCODED_ETAG.search(tag)
+        if match:
+            seen = match.group(1)
+            tag = tag[:match.start()] + '"'
+        tags.append(tag)
+    return ", ".join(tags), seen
+
+class CompressionMiddleware:
+    """
+    Compress dynamic responses above COMPRESSION_MINIMUM_SIZE with brotli (if the
+    optional `brotli` package is installed and the client accepts it) or gzip.
+    Static files are precompressed at build time and skipped here.
+    The coding is added to the ETag of compressed responses and stripped from
+    If-None-Match again, so the app's own ETag checks keep working.
+    """
+
+    def __init__(self, app: ASGIApp, skip_prefixes: tuple = ("/static",)):
+        self.app = app
+        self.skip_prefixes = skip_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(self.skip_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        accept_encoding = request_headers.get("accept-encoding", "")
+        revalidated_encoding = ""
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match:
+            stripped, revalidated_encoding = _strip_etag_encodings(if_none_match)
+            raw = [(k, v) for k, v in scope["headers"] if k != b"if-none-match"]
+            scope = {**scope, "headers": raw + [(b"if-none-match", stripped.encode("latin-1"))]}
+
+        async def send_with_etag(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if etag and etag.endswith('"'):
+                    # 304s have no body to compress: echo the coding the client revalidated
+                    encoding = headers.get("content-encoding") or (
+                        revalidated_encoding if message["status"] == 304 else ""
+                    )
+                    if encoding in ("br", "gzip"):
+                        headers["etag"] = etag[:-1] + f'-{encoding}"'
+            await send(message)
+
+        minimum_size = settings.COMPRESSION_MINIMUM_SIZE
+        if brotli is not None and _accepts(accept_encoding, "br"):
+            responder = BrotliResponder(self.app, minimum_size, settings.BROTLI_QUALITY)
+        elif _accepts(accept_encoding, "gzip"):
+            responder = GZipResponder(self.app, minimum_size, compresslevel=settings.GZIP_COMPRESS_LEVEL)
+        else:
+            responder = IdentityResponder(self.app, minimum_size)
+        await responder(scope, receive, send_with_etag)
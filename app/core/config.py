@@ -5,6 +5,15 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./attendance.db")
     
+    # Multi-tenancy
+    TENANTS_FILE: str = ""  # JSON list of tenants; empty = single tenant on DATABASE_URL
+    TENANT_ENGINE_CACHE_SIZE: int = 32  # Tenant engines (and pools) kept open
+    TENANT_POOL_SIZE: int = 5
+    TENANT_POOL_MAX_OVERFLOW: int = 5
+    TENANT_POOL_TIMEOUT_SECONDS: int = 10
+    TENANT_MAX_CONCURRENT_REQUESTS: int = 10  # Per tenant API requests in flight; 0 = unlimited
+    TENANT_QUEUE_TIMEOUT_SECONDS: int = 10  # Wait for a slot before answering 503
+    
     # JWT Settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-use-env-variable")
     ALGORITHM: str = "HS256"
@@ -22,6 +31,63 @@ class Settings(BaseSettings):
     # Default Location Radius
     DEFAULT_RADIUS_METERS: int = 50
     
+    # Late Request Workflow
+    WORKFLOW_SCHEDULER_ENABLED: bool = True
+    LATE_REQUEST_ESCALATE_AFTER_MINUTES: int = 120  # PENDING -> ESCALATED
+    LATE_REQUEST_EXPIRE_AFTER_MINUTES: int = 24 * 60  # ESCALATED -> EXPIRED (marked absent)
+    LATE_REQUEST_AUTO_APPROVE_RULES: list = []  # e.g. ["within_radius", "grace_period"]
+    LATE_REQUEST_GRACE_MINUTES: int = 15  # For the grace_period rule
+    LATE_REQUEST_RULES_INTERVAL_SECONDS: int = 60
+    
+    # Location Plausibility
+    LOCATION_CHECKS_ENABLED: bool = True  # Hold suspicious check-ins as PENDING for review
+    LOCATION_HISTORY_SIZE: int = 20  # Recent fixes kept per user
+    LOCATION_MAX_USERS: int = 100_000  # Users tracked in memory (least recently seen dropped)
+    LOCATION_MAX_SPEED_KMH: float = 300
+    LOCATION_REPEAT_THRESHOLD: int = 3  # Identical coordinates seen this many times (advisory only)
+    LOCATION_CLUSTER_USERS: int = 5  # Distinct users in one spot within the window
+    LOCATION_CLUSTER_WINDOW_MINUTES: int = 30
+    
+    # Offline Batch Sync
+    SYNC_MAX_ITEMS: int = 200
+    SYNC_CLOCK_TOLERANCE_SECONDS: int = 300  # Allowed device clock drift at send time
+    SYNC_MAX_AGE_HOURS: int = 24  # Oldest queued action accepted
+    
+    # Attendance Archival
+    ATTENDANCE_HOT_MONTHS: int = 3  # Closed months older than this move to cold storage
+    
+    # Dashboard Event Stream
+    EVENT_BUS_HISTORY_SIZE: int = 500  # Events kept per channel for Last-Event-ID resume
+    EVENT_BUS_SUBSCRIBER_QUEUE_SIZE: int = 100  # Undelivered events before a slow client is dropped
+    EVENT_STREAM_KEEPALIVE_SECONDS: int = 15
+    
+    # Background Jobs
+    JOB_WORKERS: int = 2  # Worker threads started with the app (0 = run jobs elsewhere)
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF_SECONDS: int = 10  # Doubles after every failed attempt
+    JOB_LOCK_TIMEOUT_SECONDS: int = 300  # RUNNING jobs whose lock is not renewed for this long are requeued
+    
+    # SQL Profiling
+    SQL_PROFILING: bool = False  # Log per-request query counts, slow plans and N+1 patterns
+    SQL_SLOW_QUERY_MS: float = 100
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5  # Same statement this many times in one request
+    
+    # HTTP Caching
+    # Version counters live in process memory, so a write handled by one worker is not
+    # seen by the others: only enable with a single worker or a shared VersionStore
+    # (app.core.http_cache.set_version_store). Off, ETags are computed from the body.
+    RESPONSE_VERSIONING: bool = False
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10_000  # Serialized bodies kept (0 = disabled)
+    
+    # Response Compression
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes; smaller API responses are sent as-is
+    GZIP_COMPRESS_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4  # Used when the optional brotli package is installed
+    
+    # Synthetic Load & Traces
+    TRACE_RECORD_PATH: str = ""  # Append API requests to this JSON-lines file for replay
+    
     # CORS
     CORS_ORIGINS: list = ["*"]
     
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.tenancy import current_tenant_id
+
+@dataclass
+class Event:
+    id: int
+    channel: str
+    type: str
+    data: dict = field(default_factory=dict)
+
+class Subscription:
+    """
+    A bounded per-client queue of events. If the client falls behind and the
+    queue fills up, the subscription is marked as overflowed and closed; the
+    client should then reload and resume from its last event id.
+    """
+    def __init__(
+        self,
+        bus: "EventBus",
+        channels: Optional[Iterable[str]],
+        max_queue: int,
+        namespace: str = ""
+    ):
+        self.bus = bus
+        self.channels = set(channels) if channels is not None else None
+        self.namespace = namespace
+        self.overflowed = False
+        self.closed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def matches(self, event: Event) -> bool:
+        if self.channels is None:
+            return event.channel.startswith(self.namespace)
+        return event.channel in self.channels
+
+    def deliver(self, event: Event):
+        """Thread-safe hand-off from publishers to the subscriber's event loop"""
+        self._loop.call_soon_threadsafe(self._push, event)
+
+    def _push(self, event: Event):
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.close()
+
+    async def get(self, timeout: float) -> Optional[Event]:
+        """Next event, or None if nothing arrived within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.bus.unsubscribe(self)
+
+class EventBus:
+    """Interface for publishing attendance events to dashboards"""
+
+    def publish(self, channel: str, type: str, data: dict) -> Event:
+        raise NotImplementedError
+
+    def subscribe(
+        self,
+        channels: Optional[Iterable[str]] = None,
+        last_event_id: Optional[int] = None,
+        namespace: str = ""
+    ) -> "tuple[Subscription, Optional[List[Event]]]":
+        """
+        Register a subscriber for `channels` (None = every channel whose name
+        starts with `namespace`).
+        Returns the subscription and the events after `last_event_id` to replay,
+        or None if they are no longer retained and the client must reload.
+        """
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription):
+        raise NotImplementedError
+
+class InMemoryEventBus(EventBus):
+    """Single-process bus keeping a short per-channel history for resume"""
+
+    def __init__(self, history_size: int = None, max_queue: int = None):
+        self.history_size = history_size or settings.EVENT_BUS_HISTORY_SIZE
+        self.max_queue = max_queue or settings.EVENT_BUS_SUBSCRIBER_QUEUE_SIZE
+        self._lock = threading.Lock()
+        # Ids continue from the boot time in microseconds, so ids handed out by a
+        # previous process are recognizably older than anything this one sent
+        self._boot_id = time.time_ns() // 1000
+        self._last_id = self._boot_id
+        self._history: Dict[str, Deque[Event]] = {}
+        self._evicted_id: Dict[str, int] = {}  # Newest id dropped from each channel's history
+        self._subscribers: List[Subscription] = []
+
+    def publish(self, channel: str, type: str, data: dict) -> Event:
+        with self._lock:
+            self._last_id += 1
+            event = Event(id=self._last_id, channel=channel, type=type, data=data)
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self.history_size)
+            if len(history) == history.maxlen:
+                self._evicted_id[channel] = history[0].id
+            history.append(event)
+            subscribers = [s for s in self._subscribers if s.matches(event)]
+
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return event
+
+    def subscribe(self, channels=None, last_event_id=None, namespace=""):
+        subscription = Subscription(self, channels, self.max_queue, namespace)
+        with self._lock:
+            self._subscribers.append(subscription)
+            if last_event_id is None:
+                return subscription, []
+            if not self._boot_id <= last_event_id <= self._last_id:
+                # Issued by another (e.g. restarted) process: what was missed is unknown
+                return subscription, None
+
+            if channels is None:
+                names = [name for name in self._history if name.startswith(namespace)]
+            else:
+                names = channels
+            replay = []
+            for name in names:
+                if self._evicted_id.get(name, 0) > last_event_id:
+                    return subscription, None
+                replay.extend(e for e in self._history.get(name, ()) if e.id > last_event_id)
+
+        replay.sort(key=lambda e: e.id)
+        return subscription, replay
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+_event_bus: EventBus = None
+
+def get_event_bus() -> EventBus:
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = InMemoryEventBus()
+    return _event_bus
+
+def set_event_bus(bus: EventBus):
+    """Swap in another EventBus implementation (e.g. a shared broker for multiple workers)"""
+    global _event_bus
+    _event_bus = bus
+
+def tenant_namespace() -> str:
+    """Prefix of every channel belonging to the current tenant"""
+    return f"{current_tenant_id()}/"
+
+def team_channel(team: Optional[str]) -> str:
+    return f"{tenant_namespace()}team:{team or '-'}"
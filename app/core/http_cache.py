@@ -0,0 +1,152 @@
+import json
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from app.core.config import settings
+from app.core.tenancy import current_tenant_id
+
+PRIVATE_REVALIDATE = "private, no-cache"
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag from the response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+def _serialize(content) -> bytes:
+    return json.dumps(jsonable_encoder(content), separators=(",", ":")).encode("utf-8")
+
+def conditional_json_response(
+    request: Request,
+    content,
+    cache_control: str = PRIVATE_REVALIDATE
+) -> Response:
+    """Serialize `content` once, tag it, and answer 304 if the client already has it"""
+    body = _serialize(content)
+    etag = make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+class VersionStore:
+    """Interface for data version counters that writes bump and cached reads check"""
+
+    def get(self, key: str) -> str:
+        raise NotImplementedError
+
+    def bump(self, *keys: str):
+        raise NotImplementedError
+
+class InMemoryVersionStore(VersionStore):
+    """
+    Per-process counters. Versions carry a random boot id so ETags never
+    survive a restart. With several workers, plug in a shared store instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boot = secrets.token_hex(4)
+        self._versions: Dict[str, int] = {}
+
+    def get(self, key: str) -> str:
+        return f"{self._boot}.{self._versions.get(key, 0)}"
+
+    def bump(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+class ResponseCache:
+    """LRU of serialized response bodies keyed by (resource, version)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, body: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+_version_store: VersionStore = None
+_response_cache: ResponseCache = None
+
+def get_version_store() -> VersionStore:
+    global _version_store
+    if _version_store is None:
+        _version_store = InMemoryVersionStore()
+    return _version_store
+
+def set_version_store(store: VersionStore):
+    """Swap in another VersionStore implementation (e.g. shared across workers)"""
+    global _version_store
+    _version_store = store
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
+    return _response_cache
+
+def versioned_json_response(
+    request: Request,
+    resource: str,
+    version_key: str,
+    build: Callable[[], object],
+    cache_control: str = PRIVATE_REVALIDATE
+) -> Response:
+    """
+    Answer a read whose content only changes when `version_key` is bumped.
+    The ETag is derived from the resource and its version, so a matching
+    If-None-Match returns 304 without calling `build` (no queries, no
+    serialization); otherwise the body comes from the response cache or `build`.
+    """
+    if not settings.RESPONSE_VERSIONING:
+        return conditional_json_response(request, build(), cache_control)
+
+    version = get_version_store().get(version_key)
+    cache_key = f"{current_tenant_id()}/{resource}@{version}"
+    etag = '"' + hashlib.sha256(cache_key.encode("utf-8")).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    cache = get_response_cache()
+    body = cache.get(cache_key)
+    if body is None:
+        body = _serialize(build())
+        cache.put(cache_key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def user_version_key(user_id: int) -> str:
+    return f"{current_tenant_id()}/user:{user_id}"
+
+def pending_version_key(team: Optional[str]) -> str:
+    return f"{current_tenant_id()}/pending:{team or '*'}"
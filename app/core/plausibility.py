@@ -0,0 +1,125 @@
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Tuple
+from app.core.geo import haversine
+from app.core.config import settings
+from app.core.tenancy import current_tenant_id
+
+# Movement under this distance never counts as impossible travel (GPS noise)
+MIN_TRAVEL_DISTANCE_M = 1000
+# ~11 m cells for the shared-location check
+CLUSTER_CELL_DECIMALS = 4
+SWEEP_EVERY = 1000
+
+# Reported (e.g. by the offline batch mode) but never enough to hold a check-in:
+# browsers that locate by Wi-Fi repeat the same coordinates every day
+ADVISORY_FLAGS = {"repeated_coordinates"}
+
+def _insert_sorted(fixes: deque, item: tuple) -> bool:
+    """Insert by timestamp (offline replays arrive late); False if older than a full history"""
+    position = len(fixes)
+    while position and fixes[position - 1][0] > item[0]:
+        position -= 1
+    if fixes.maxlen is not None and len(fixes) == fixes.maxlen:
+        if position == 0:
+            return False
+        fixes.popleft()
+        position -= 1
+    fixes.insert(position, item)
+    return True
+
+class LocationScorer:
+    """
+    Flags implausible check-in locations using each user's recent fixes:
+    - impossible_travel: speed from the nearest earlier fix above LOCATION_MAX_SPEED_KMH
+    - repeated_coordinates: the exact same lat/lng reported again (advisory, see ADVISORY_FLAGS)
+    - location_cluster: many different users reporting from one ~11 m cell
+    check() only reads; remember() records a fix once its check-in is committed.
+    All state is in memory and bounded (fixes per user, number of users, cluster window),
+    and keyed by tenant since user ids and locations only mean something within one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fixes: "OrderedDict[Tuple[str, int], Deque[Tuple[datetime, float, float]]]" = OrderedDict()
+        self._cells: Dict[Tuple[str, float, float], Deque[Tuple[datetime, int]]] = {}
+        self._remembered = 0
+
+    def _cell(self, tenant_id: str, lat: float, lng: float) -> Tuple[str, float, float]:
+        return (tenant_id, round(lat, CLUSTER_CELL_DECIMALS), round(lng, CLUSTER_CELL_DECIMALS))
+
+    def check(self, user_id: int, lat: float, lng: float, at: datetime) -> List[str]:
+        """Return the reasons this fix looks spoofed (empty if plausible) without remembering it"""
+        flags = []
+        cluster_window = timedelta(minutes=settings.LOCATION_CLUSTER_WINDOW_MINUTES)
+        tenant_id = current_tenant_id()
+
+        with self._lock:
+            fixes = self._fixes.get((tenant_id, user_id), ())
+            earlier = next((fix for fix in reversed(fixes) if fix[0] <= at), None)
+            if earlier is not None:
+                last_at, last_lat, last_lng = earlier
+                distance = haversine(last_lat, last_lng, lat, lng)
+                seconds = (at - last_at).total_seconds()
+                if distance > MIN_TRAVEL_DISTANCE_M and (
+                    seconds == 0 or distance / seconds * 3.6 > settings.LOCATION_MAX_SPEED_KMH
+                ):
+                    flags.append("impossible_travel")
+
+            repeats = sum(1 for _, f_lat, f_lng in fixes if f_lat == lat and f_lng == lng)
+            if repeats + 1 >= settings.LOCATION_REPEAT_THRESHOLD:
+                flags.append("repeated_coordinates")
+
+            visits = self._cells.get(self._cell(tenant_id, lat, lng), ())
+            users = {uid for visit_at, uid in visits if abs(visit_at - at) <= cluster_window}
+            if len(users | {user_id}) >= settings.LOCATION_CLUSTER_USERS:
+                flags.append("location_cluster")
+
+        return flags
+
+    def remember(self, user_id: int, lat: float, lng: float, at: datetime):
+        """Add a recorded fix to the user's history and its location cell"""
+        cluster_window = timedelta(minutes=settings.LOCATION_CLUSTER_WINDOW_MINUTES)
+        tenant_id = current_tenant_id()
+        key = (tenant_id, user_id)
+
+        with self._lock:
+            fixes = self._fixes.get(key)
+            if fixes is None:
+                fixes = self._fixes[key] = deque(maxlen=settings.LOCATION_HISTORY_SIZE)
+                if len(self._fixes) > settings.LOCATION_MAX_USERS:
+                    self._fixes.popitem(last=False)
+            else:
+                self._fixes.move_to_end(key)
+            _insert_sorted(fixes, (at, lat, lng))
+
+            cell = self._cell(tenant_id, lat, lng)
+            visits = self._cells.get(cell)
+            if visits is None:
+                visits = self._cells[cell] = deque()
+            _insert_sorted(visits, (at, user_id))
+            while visits[0][0] < visits[-1][0] - cluster_window:
+                visits.popleft()
+
+            self._remembered += 1
+            if self._remembered % SWEEP_EVERY == 0:
+                self._sweep_cells(at - cluster_window)
+
+    def score(self, user_id: int, lat: float, lng: float, at: datetime) -> List[str]:
+        """check() and remember() in one step, for replaying stored check-ins"""
+        flags = self.check(user_id, lat, lng, at)
+        self.remember(user_id, lat, lng, at)
+        return flags
+
+    def _sweep_cells(self, expired_before: datetime):
+        for cell in [c for c, v in self._cells.items() if not v or v[-1][0] < expired_before]:
+            del self._cells[cell]
+
+_location_scorer: LocationScorer = None
+
+def get_location_scorer() -> LocationScorer:
+    global _location_scorer
+    if _location_scorer is None:
+        _location_scorer = LocationScorer()
+    return _location_scorer
@@ -1,7 +1,10 @@
+import hmac
+import hashlib
 import secrets
 from typing import Optional
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.core.tenancy import current_tenant_id
 from datetime import datetime, timedelta
 
 import bcrypt
@@ -41,3 +44,13 @@ def verify_token(token: str):
 
 def generate_password_reset_token() -> str:
     return secrets.token_urlsafe(32)
+
+def derive_sync_key(user_id: int, tenant_id: str = None) -> str:
+    """Per-user (and per-tenant) key the mobile app uses to sign offline sync batches"""
+    message = f"sync:{tenant_id or current_tenant_id()}:{user_id}"
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+
+def verify_sync_signature(user_id: int, body: bytes, signature: str) -> bool:
+    """Check a hex HMAC-SHA256 of the raw request body made with the user's sync key"""
+    expected = hmac.new(derive_sync_key(user_id).encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
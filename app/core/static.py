@@ -0,0 +1,170 @@
+import os
+import re
+import sys
+import gzip
+import json
+import hashlib
+from mimetypes import guess_type
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # Optional: only .gz files are built without it
+    brotli = None
+
+# name.<hash>.ext files never change, so browsers may keep them for a year
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Preferred first; each maps to the suffix the build step writes
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE = {".html", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".map", ".xml", ".ico"}
+HASHABLE = COMPRESSIBLE - {".html"}
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(name.strip().lower())
+    return accepted
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves build-time `.br`/`.gz` siblings when the client
+    accepts them, marks content-hashed files immutable and everything else
+    `no-cache` (revalidated with ETag / Last-Modified). Files go out through
+    FileResponse, which uses the server's zero-copy `pathsend` when offered.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        media_type = guess_type(str(full_path))[0] or "application/octet-stream"
+
+        response = None
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            compressed_path = f"{full_path}{suffix}"
+            try:
+                compressed_stat = os.stat(compressed_path)
+            except FileNotFoundError:
+                continue
+            response = FileResponse(
+                compressed_path,
+                status_code=status_code,
+                stat_result=compressed_stat,
+                media_type=media_type,
+                headers={"Content-Encoding": encoding}
+            )
+            break
+
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+
+        response.headers["Vary"] = "Accept-Encoding"
+        is_hashed = HASHED_NAME.search(os.path.basename(str(full_path)))
+        response.headers["Cache-Control"] = IMMUTABLE if is_hashed else REVALIDATE
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+def _write_compressed(path: str, data: bytes):
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+def _reference_patterns(manifest: dict, url_prefix: str) -> list:
+    # Match plain and previously hashed references so rebuilding HTML in place is idempotent
+    references = []
+    for original, hashed in manifest.items():
+        stem, suffix = os.path.splitext(original)
+        pattern = re.escape(url_prefix + stem) + r"(?:\.[0-9a-f]{8,})?" + re.escape(suffix) + r"\b"
+        references.append((re.compile(pattern), hashed))
+    return references
+
+def _rewrite_references(data: bytes, references: list, url_prefix: str) -> bytes:
+    text = data.decode("utf-8")
+    for pattern, hashed in references:
+        text = pattern.sub(url_prefix + hashed, text)
+    return text.encode("utf-8")
+
+def _hashed_name(relative: str, data: bytes) -> str:
+    stem, suffix = os.path.splitext(relative)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{suffix}"
+
+def build_static(directory: str, url_prefix: str = "/static/") -> dict:
+    """
+    Build step: copy every hashable asset to name.<hash>.ext, point HTML/CSS
+    references at the hashed names, and write .gz (and .br) next to each text
+    asset. CSS is hashed after its references are rewritten, so a hashed name
+    always identifies the exact bytes served under it.
+    Returns and saves the original -> hashed name manifest.
+    """
+    manifest = {}
+    sources = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            ext = os.path.splitext(name)[1].lower()
+            if name.endswith((".gz", ".br")) or HASHED_NAME.search(name) or name == "manifest.json":
+                continue
+            sources.append((path, ext))
+
+    stylesheets = {}
+    for path, ext in sources:
+        if ext not in HASHABLE:
+            continue
+        relative = os.path.relpath(path, directory).replace(os.sep, "/")
+        with open(path, "rb") as f:
+            data = f.read()
+        manifest[relative] = _hashed_name(relative, data)
+        if ext == ".css":
+            stylesheets[relative] = data
+
+    # Stylesheets can reference each other (@import): rehash until no name changes
+    for _ in range(len(stylesheets) + 1):
+        references = _reference_patterns(manifest, url_prefix)
+        changed = False
+        for relative, data in stylesheets.items():
+            hashed = _hashed_name(relative, _rewrite_references(data, references, url_prefix))
+            if manifest[relative] != hashed:
+                manifest[relative] = hashed
+                changed = True
+        if not changed:
+            break
+    references = _reference_patterns(manifest, url_prefix)
+
+    for path, ext in sources:
+        if ext not in COMPRESSIBLE:
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+
+        if ext in (".html", ".css"):
+            data = _rewrite_references(data, references, url_prefix)
+            if ext == ".html":
+                with open(path, "wb") as f:
+                    f.write(data)
+
+        relative = os.path.relpath(path, directory).replace(os.sep, "/")
+        target = os.path.join(directory, manifest[relative]) if relative in manifest else path
+        if target != path:
+            with open(target, "wb") as f:
+                f.write(data)
+        _write_compressed(target, data)
+
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else "frontend"
+    manifest = build_static(directory)
+    print(f"Built {len(manifest)} hashed assets in {directory} (brotli: {'yes' if brotli else 'not installed'})")
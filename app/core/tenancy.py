@@ -0,0 +1,159 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+
+DEFAULT_TENANT_ID = "default"
+
+class TenantConfig(BaseModel):
+    id: str
+    database_url: str
+    schema_name: Optional[str] = None  # PostgreSQL schema when tenants share a database
+    hosts: List[str] = []  # Host names that resolve to this tenant
+    pool_size: Optional[int] = None  # Overrides TENANT_POOL_SIZE
+    settings: Dict[str, Any] = {}  # Overrides of Settings fields, e.g. {"CHECK_IN_START_HOUR": 7}
+
+_tenants: Dict[str, TenantConfig] = None
+_hosts: Dict[str, str] = {}
+_current_tenant: ContextVar[Optional[TenantConfig]] = ContextVar("current_tenant", default=None)
+
+def _default_tenant() -> TenantConfig:
+    return TenantConfig(id=DEFAULT_TENANT_ID, database_url=settings.DATABASE_URL)
+
+def load_tenants(path: str = None) -> Dict[str, TenantConfig]:
+    """
+    Read the tenant registry (a JSON list of TenantConfig) into memory.
+    Without TENANTS_FILE the app runs single-tenant on DATABASE_URL.
+    """
+    global _tenants, _hosts
+    path = path if path is not None else settings.TENANTS_FILE
+    if not path:
+        tenants = [_default_tenant()]
+    else:
+        with open(path) as f:
+            tenants = [TenantConfig(**item) for item in json.load(f)]
+
+    _tenants = {tenant.id: tenant for tenant in tenants}
+    _hosts = {host.lower(): tenant.id for tenant in tenants for host in tenant.hosts}
+    return _tenants
+
+def get_tenants() -> Dict[str, TenantConfig]:
+    if _tenants is None:
+        load_tenants()
+    return _tenants
+
+def is_multi_tenant() -> bool:
+    return bool(settings.TENANTS_FILE)
+
+def get_current_tenant() -> TenantConfig:
+    """Tenant of the current request or background task (the only tenant when single-tenant)"""
+    tenant = _current_tenant.get()
+    if tenant is None:
+        if is_multi_tenant():
+            # Falling back to some tenant would read or write another organization's data
+            raise RuntimeError("No tenant bound: wrap background work in tenant_context()")
+        tenants = get_tenants()
+        tenant = tenants.get(DEFAULT_TENANT_ID) or next(iter(tenants.values()))
+    return tenant
+
+def current_tenant_id() -> str:
+    return get_current_tenant().id
+
+def tenant_setting(name: str):
+    """A setting with the current tenant's override applied"""
+    overrides = get_current_tenant().settings
+    return overrides[name] if name in overrides else getattr(settings, name)
+
+@contextmanager
+def tenant_context(tenant: TenantConfig):
+    """Run background work on behalf of a tenant"""
+    token = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
+
+def resolve_tenant(headers: Headers) -> Optional[TenantConfig]:
+    """Pick the tenant from X-Tenant-ID, then the Host header"""
+    tenants = get_tenants()
+    if not is_multi_tenant():
+        return get_current_tenant()
+
+    tenant_id = headers.get("x-tenant-id")
+    if tenant_id:
+        return tenants.get(tenant_id)
+
+    host = headers.get("host", "").split(":")[0].lower()
+    if host in _hosts:
+        return tenants[_hosts[host]]
+    subdomain = host.split(".")[0]
+    return tenants.get(subdomain)
+
+# Long-lived streams, kept out of the per-tenant request limit
+UNLIMITED_PATHS = {"/api/attendance/events"}
+
+class TenantMiddleware:
+    """
+    Resolve the tenant once per request and expose it to everything downstream.
+    With several tenants, each may run at most TENANT_MAX_CONCURRENT_REQUESTS API
+    requests at once; the rest wait here, off the shared threadpool, and get 503
+    after TENANT_QUEUE_TIMEOUT_SECONDS. The event stream (UNLIMITED_PATHS) is not counted.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _limited(self, scope: Scope) -> bool:
+        return (
+            is_multi_tenant()
+            and settings.TENANT_MAX_CONCURRENT_REQUESTS > 0
+            and scope["type"] == "http"
+            and scope["path"].startswith("/api")
+            and scope["path"] not in UNLIMITED_PATHS
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        tenant = resolve_tenant(Headers(scope=scope))
+        if tenant is None and not scope["path"].startswith("/api"):
+            # Frontend assets and docs are shared by every tenant
+            await self.app(scope, receive, send)
+            return
+        if tenant is None:
+            response = JSONResponse({"detail": "Unknown tenant"}, status_code=404)
+            await response(scope, receive, send)
+            return
+
+        if not self._limited(scope):
+            with tenant_context(tenant):
+                await self.app(scope, receive, send)
+            return
+
+        slots = self._slots.get(tenant.id)
+        if slots is None:
+            slots = self._slots[tenant.id] = asyncio.Semaphore(settings.TENANT_MAX_CONCURRENT_REQUESTS)
+        try:
+            await asyncio.wait_for(slots.acquire(), settings.TENANT_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            response = JSONResponse(
+                {"detail": "Too many concurrent requests for this organization"},
+                status_code=503,
+                headers={"Retry-After": "1"}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            with tenant_context(tenant):
+                await self.app(scope, receive, send)
+        finally:
+            slots.release()
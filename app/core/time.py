@@ -1,11 +1,11 @@
 from datetime import datetime, time
-from app.core.config import settings
+from app.core.tenancy import tenant_setting
 
 def get_check_in_time_window():
-    """Get check-in time window from settings"""
+    """Get check-in time window from the current tenant's settings"""
     return (
-        time(settings.CHECK_IN_START_HOUR, settings.CHECK_IN_START_MINUTE),
-        time(settings.CHECK_IN_END_HOUR, settings.CHECK_IN_END_MINUTE)
+        time(tenant_setting("CHECK_IN_START_HOUR"), tenant_setting("CHECK_IN_START_MINUTE")),
+        time(tenant_setting("CHECK_IN_END_HOUR"), tenant_setting("CHECK_IN_END_MINUTE"))
     )
 
 def check_time(now: datetime) -> str:
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from typing import Any, Optional
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.security import verify_token
+
+# Request bodies above this size are not recorded (the request itself still is)
+MAX_RECORDED_BODY = 64 * 1024
+
+# JSON body fields whose values are replaced before a request is written
+REDACTED_FIELDS = {"password", "new_password", "token", "access_token", "sync_key"}
+REDACTED = "[redacted]"
+
+def _redact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: REDACTED if k.lower() in REDACTED_FIELDS else _redact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+def _recorded_body(path: str, body: Optional[bytes]) -> Optional[str]:
+    """Body as written to the trace: secrets in JSON masked, other auth bodies dropped"""
+    if not body:
+        return None
+    text = body.decode("utf-8", "replace")
+    try:
+        return json.dumps(_redact(json.loads(text)), separators=(",", ":"))
+    except ValueError:
+        return None if path.startswith("/api/auth") else text
+
+class TraceRecorderMiddleware:
+    """
+    Append every API request to a JSON-lines trace for later replay
+    (`python -m app.services.synthetic_service replay`). Credentials are not
+    written: only the user id and tenant from the bearer token are kept (the
+    replay tool mints fresh tokens for them), REDACTED_FIELDS in JSON bodies
+    are masked, and auth bodies that are not JSON are dropped.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, prefix: str = "/api"):
+        self.app = app
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1, encoding="utf-8")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.time()
+        chunks = []
+        size = 0
+        status = None
+
+        async def recording_receive() -> Message:
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                size += len(message.get("body", b""))
+                if size <= MAX_RECORDED_BODY:
+                    chunks.append(message.get("body", b""))
+            return message
+
+        async def recording_send(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            self._write(scope, started, b"".join(chunks) if size <= MAX_RECORDED_BODY else None, status)
+
+    def _write(self, scope: Scope, started: float, body: Optional[bytes], status: Optional[int]):
+        headers = Headers(scope=scope)
+        user_id, tenant = None, headers.get("x-tenant-id")
+        authorization = headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            payload = verify_token(authorization[7:]) or {}
+            user_id = payload.get("sub")
+            tenant = payload.get("tenant", tenant)
+
+        entry = {
+            "at": round(started, 6),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope["query_string"].decode("latin-1"),
+            "content_type": headers.get("content-type"),
+            "body": _recorded_body(scope["path"], body),
+            "user_id": int(user_id) if user_id is not None else None,
+            "tenant": tenant,
+            "status": status,
+            "duration_ms": round((time.time() - started) * 1000, 2)
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
@@ -0,0 +1,175 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class QueryRecord:
+    statement: str
+    duration_ms: float
+    plan: Optional[str] = None
+
+@dataclass
+class QueryStats:
+    queries: List[QueryRecord] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(q.duration_ms for q in self.queries)
+
+    @property
+    def slow(self) -> List[QueryRecord]:
+        return [q for q in self.queries if q.duration_ms >= settings.SQL_SLOW_QUERY_MS]
+
+    def repeated(self, threshold: int = None) -> List[Tuple[str, int]]:
+        """Statements run at least `threshold` times: the usual N+1 signature"""
+        threshold = threshold or settings.SQL_N_PLUS_ONE_THRESHOLD
+        counts = Counter(q.statement for q in self.queries)
+        return [(statement, n) for statement, n in counts.most_common() if n >= threshold]
+
+# Per-request stats (propagates into threadpool-run sync endpoints)
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("sql_request_stats", default=None)
+# Process-wide collectors used by test helpers, independent of request context
+_global_stats: List[QueryStats] = []
+_installed = set()
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    """
+    Fetch the plan through a raw DBAPI cursor so it is not itself profiled.
+    It runs on the request's own connection, so outside SQLite it is wrapped in
+    a savepoint: a failed EXPLAIN must not abort the request's transaction.
+    """
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return None
+    sqlite = conn.dialect.name == "sqlite"
+    prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if not sqlite:
+                cursor.execute("SAVEPOINT sql_profiling_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                plan = "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+            except Exception:
+                if not sqlite:
+                    cursor.execute("ROLLBACK TO SAVEPOINT sql_profiling_explain")
+                raise
+            if not sqlite:
+                cursor.execute("RELEASE SAVEPOINT sql_profiling_explain")
+            return plan
+        finally:
+            cursor.close()
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_stats.get() is not None or _global_stats:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+
+    record = QueryRecord(statement=statement, duration_ms=duration_ms)
+    if duration_ms >= settings.SQL_SLOW_QUERY_MS and not executemany:
+        record.plan = _explain(conn, statement, parameters)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries.append(record)
+    for collector in _global_stats:
+        collector.queries.append(record)
+
+def install_profiling(engine: Engine):
+    """Attach the query-recording listeners to an engine (idempotent)"""
+    if id(engine) in _installed:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _installed.add(id(engine))
+
+@contextmanager
+def profile_queries():
+    """Record the queries issued in the current context (e.g. one request)"""
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+@contextmanager
+def capture_queries():
+    """Record every query issued in the process while the block runs"""
+    from app.db.session import engine
+    install_profiling(engine)
+
+    stats = QueryStats()
+    _global_stats.append(stats)
+    try:
+        yield stats
+    finally:
+        _global_stats.remove(stats)
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """
+    Test helper: fail if the block issues more than `limit` queries.
+
+        with assert_max_queries(3):
+            client.post("/api/attendance/check-in", json=..., headers=...)
+    """
+    with capture_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        statements = "\n".join(f"  {i + 1}. {q.statement}" for i, q in enumerate(stats.queries))
+        raise AssertionError(f"Expected at most {limit} queries, got {stats.count}:\n{statements}")
+
+def log_request_stats(method: str, path: str, stats: QueryStats):
+    logger.info("%s %s: %d queries in %.1f ms", method, path, stats.count, stats.total_ms)
+    for statement, n in stats.repeated():
+        logger.warning("%s %s: possible N+1, statement ran %d times: %s", method, path, n, statement)
+    for query in stats.slow:
+        logger.warning(
+            "%s %s: slow query (%.1f ms): %s\nPlan:\n%s",
+            method, path, query.duration_ms, query.statement, query.plan
+        )
+
+class QueryProfilingMiddleware:
+    """ASGI middleware: per-request query counts, slow statements with plans and N+1 warnings"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as stats:
+            async def send_with_count(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-query-count", str(stats.count).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_count)
+            finally:
+                log_request_stats(scope["method"], scope["path"], stats)
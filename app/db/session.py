@@ -1,17 +1,124 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Set
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
+from app.core.tenancy import TenantConfig, get_current_tenant
+from app.db.profiling import install_profiling
+
+def _connect_args(url: str) -> dict:
+    return {"check_same_thread": False} if "sqlite" in url else {}
 
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args=_connect_args(settings.DATABASE_URL)
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+class TenantEngineCache:
+    """
+    LRU of per-tenant engines, each with its own bounded pool, so one tenant's
+    spike queues on its own connections instead of starving the others.
+    Engines evicted from the cache are disposed.
+
+    Background loops that walk every tenant use get_background() instead, so
+    they never evict (and dispose) an engine that requests are using.
+    """
+
+    def __init__(self, max_engines: int):
+        self.max_engines = max_engines
+        self._lock = threading.Lock()
+        self._factories: "OrderedDict[str, sessionmaker]" = OrderedDict()
+        self._background: Dict[str, sessionmaker] = {}
+        self._schema_ready: Set[str] = set()  # Tenants whose tables exist
+
+    def _create_engine(self, tenant: TenantConfig, pooled: bool = True) -> Engine:
+        from app.db.upgrade import upgrade_schema
+
+        if tenant.database_url == settings.DATABASE_URL and not tenant.schema_name:
+            tenant_engine = engine
+        else:
+            pool_args = {}
+            if not pooled:
+                pool_args = {"poolclass": NullPool}
+            elif not tenant.database_url.startswith("sqlite"):
+                pool_args = {
+                    "pool_size": tenant.pool_size or settings.TENANT_POOL_SIZE,
+                    "max_overflow": settings.TENANT_POOL_MAX_OVERFLOW,
+                    "pool_timeout": settings.TENANT_POOL_TIMEOUT_SECONDS,
+                    "pool_pre_ping": True
+                }
+            tenant_engine = create_engine(
+                tenant.database_url,
+                connect_args=_connect_args(tenant.database_url),
+                **pool_args
+            )
+            if settings.SQL_PROFILING:
+                install_profiling(tenant_engine)
+            if tenant.schema_name:
+                tenant_engine = tenant_engine.execution_options(
+                    schema_translate_map={None: tenant.schema_name}
+                )
+
+        if tenant.id not in self._schema_ready:
+            upgrade_schema(tenant_engine, tenant.schema_name)
+            self._schema_ready.add(tenant.id)
+        return tenant_engine
+
+    def get(self, tenant: TenantConfig) -> sessionmaker:
+        with self._lock:
+            factory = self._factories.get(tenant.id)
+            if factory is not None:
+                self._factories.move_to_end(tenant.id)
+                return factory
+
+        # Connect outside the lock so a slow tenant database does not block the rest
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=self._create_engine(tenant))
+
+        with self._lock:
+            existing = self._factories.get(tenant.id)
+            if existing is not None:
+                factory.kw["bind"].dispose()
+                return existing
+            self._factories[tenant.id] = factory
+            while len(self._factories) > self.max_engines:
+                _, evicted = self._factories.popitem(last=False)
+                if evicted.kw["bind"] is not engine:
+                    evicted.kw["bind"].dispose()
+        return factory
+
+    def get_background(self, tenant: TenantConfig) -> sessionmaker:
+        """
+        The tenant's request engine if it is cached (its LRU position untouched),
+        otherwise a pool-less engine that holds no connections between uses
+        """
+        with self._lock:
+            factory = self._factories.get(tenant.id) or self._background.get(tenant.id)
+            if factory is not None:
+                return factory
+
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=self._create_engine(tenant, pooled=False))
+
+        with self._lock:
+            return self._background.setdefault(tenant.id, factory)
+
+_engine_cache = TenantEngineCache(settings.TENANT_ENGINE_CACHE_SIZE)
+
+def get_session_factory() -> sessionmaker:
+    """Session factory for the current tenant"""
+    return _engine_cache.get(get_current_tenant())
+
+def get_background_session_factory() -> sessionmaker:
+    """Session factory for the current tenant in job workers and schedulers"""
+    return _engine_cache.get_background(get_current_tenant())
+
 def get_db():
     """Dependency for getting database session"""
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
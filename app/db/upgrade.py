@@ -0,0 +1,76 @@
+"""
+Bring an existing database up to the models. `create_all` only creates missing
+tables; this also adds columns and indexes introduced since a table was
+created, drops indexes that newer ones replaced and normalizes data whose
+format changed (lower-cased emails). Every step checks first, so it is safe
+to run on each start (the app does) or by hand:
+
+    python -m app.db.upgrade
+"""
+import logging
+from sqlalchemy import func, inspect, text, update
+from sqlalchemy.engine import Engine
+from app.db.base import Base
+from app.models import approval_event, attendance, attendance_archive, job, user  # Register every table
+
+logger = logging.getLogger(__name__)
+
+# Indexes superseded by a later one, dropped where still present
+RETIRED_INDEXES = {
+    "attendance": ["ix_attendance_user_id"],  # Leading column of ix_attendance_user_created
+}
+
+def _qualified(bind: Engine, name: str, schema: str = None) -> str:
+    quote = bind.dialect.identifier_preparer.quote
+    return f"{quote(schema)}.{quote(name)}" if schema else quote(name)
+
+def _normalize_data(conn):
+    # Emails are matched case-insensitively by storing them lower-cased
+    conn.execute(
+        update(user.User)
+        .where(user.User.email != func.lower(user.User.email))
+        .values(email=func.lower(user.User.email))
+    )
+
+def upgrade_schema(bind: Engine, schema: str = None):
+    """Create missing tables, columns and indexes in `schema` (the default one if None), then normalize data"""
+    Base.metadata.create_all(bind=bind)
+
+    inspector = inspect(bind)
+    quote = bind.dialect.identifier_preparer.quote
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name, schema=schema)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} to existing rows")
+                logger.info("Adding column %s.%s", table.name, column.name)
+                conn.execute(text(
+                    f"ALTER TABLE {_qualified(bind, table.name, schema)} "
+                    f"ADD COLUMN {quote(column.name)} {column.type.compile(dialect=bind.dialect)}"
+                ))
+
+            indexes = {i["name"] for i in inspector.get_indexes(table.name, schema=schema)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    logger.info("Creating index %s", index.name)
+                    index.create(bind=conn)
+            for name in RETIRED_INDEXES.get(table.name, []):
+                if name in indexes:
+                    logger.info("Dropping index %s", name)
+                    conn.execute(text(f"DROP INDEX {_qualified(bind, name, schema)}"))
+
+        _normalize_data(conn)
+
+if __name__ == "__main__":
+    from app.core.tenancy import get_tenants, tenant_context
+    from app.db.session import get_session_factory
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for tenant in get_tenants().values():
+        with tenant_context(tenant):
+            # Opening the tenant's engine runs the upgrade
+            get_session_factory()
+            print(f"[{tenant.id}] Schema up to date")
@@ -1,17 +1,39 @@
 import os
-from fastapi import FastAPI
-from app.db.base import Base
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from app.db.session import engine
+from app.db.upgrade import upgrade_schema
+from app.db.profiling import QueryProfilingMiddleware, install_profiling
 from app.core.config import settings
-from app.api import auth, attendance
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from app.api import auth, attendance, jobs
+from app.services.job_queue import JobWorker
+from app.services.workflow_service import get_sla_scheduler
+from app.core.compression import CompressionMiddleware
+from app.core.static import PrecompressedStaticFiles
+from app.core.tenancy import TenantMiddleware
+from app.core.traces import TraceRecorderMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables and add columns and indexes missing from older databases
+upgrade_schema(engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run background job workers and the late request SLA timers for the lifetime of the app"""
+    worker = JobWorker()
+    if worker.workers > 0:
+        worker.start()
+    if settings.WORKFLOW_SCHEDULER_ENABLED:
+        get_sla_scheduler().start()
+    yield
+    get_sla_scheduler().stop()
+    worker.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+# Route each request to its tenant (X-Tenant-ID header or subdomain). Added before CORS
+# so preflights, which carry no custom headers, are answered before tenant lookup
+app.add_middleware(TenantMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -22,17 +44,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress API responses (static assets are precompressed at build time)
+app.add_middleware(CompressionMiddleware)
+
+# SQL profiling (development / load testing)
+if settings.SQL_PROFILING:
+    install_profiling(engine)
+    app.add_middleware(QueryProfilingMiddleware)
+
+# Record request traces for capacity planning replays
+if settings.TRACE_RECORD_PATH:
+    app.add_middleware(TraceRecorderMiddleware, path=settings.TRACE_RECORD_PATH)
+
 # API routes (must be before static files)
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(attendance.router, prefix="/api/attendance", tags=["Attendance"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
 
+static_files = None
 if os.path.exists("frontend"):
-    app.mount("/static", StaticFiles(directory="frontend"), name="static")
+    static_files = PrecompressedStaticFiles(directory="frontend")
+    app.mount("/static", static_files, name="static")
 
 @app.get("/")
-async def read_root():
+async def read_root(request: Request):
     """Serve frontend HTML"""
-    if os.path.exists("frontend/index.html"):
-        return FileResponse("frontend/index.html")
+    if static_files is not None:
+        full_path, stat_result = static_files.lookup_path("index.html")
+        if stat_result is not None:
+            return static_files.file_response(full_path, stat_result, request.scope)
     return {"message": "Remote Attendance System API use /docs for API documentation", "docs": "/docs"}
 
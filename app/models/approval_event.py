@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class ApprovalEvent(Base):
+    """Append-only audit trail of late request state changes"""
+    __tablename__ = "approval_events"
+
+    id = Column(Integer, primary_key=True)
+    attendance_id = Column(Integer, ForeignKey("attendance.id"), nullable=False, index=True)
+    actor_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # None = system (timer or rule)
+    from_state = Column(String, nullable=True)
+    to_state = Column(String, nullable=False)
+    comment = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
@@ -1,18 +1,29 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Boolean, Index
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        # Serves the daily duplicate check and history paging in one index range scan
+        Index("ix_attendance_user_created", "user_id", "created_at"),
+        # Open late requests for the workflow scheduler and bulk rules
+        Index("ix_attendance_request_state_due", "request_state", "due_at"),
+        # Makes offline sync items idempotent per device-generated id
+        Index("ux_attendance_user_sync_client", "user_id", "sync_client_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Leading column of ix_attendance_user_created
     status = Column(String, nullable=False)  # PRESENT | ABSENT | PENDING
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     distance_from_home = Column(Float, nullable=True)  # Distance in meters
     is_late_request = Column(Boolean, default=False)
     late_request_reason = Column(Text, nullable=True)
+    request_state = Column(String, nullable=True)  # PENDING | ESCALATED | APPROVED | REJECTED | EXPIRED
+    due_at = Column(DateTime, nullable=True)  # Next SLA deadline while the request is open
+    sync_client_id = Column(String, nullable=True)  # Device id of the offline sync item that created the row
     approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     approved_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now(), index=True)
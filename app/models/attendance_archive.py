@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime, Date, ForeignKey, LargeBinary, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class AttendanceArchive(Base):
+    """Cold storage: one compressed block of attendance rows per user per closed month"""
+    __tablename__ = "attendance_archive"
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", name="uq_attendance_archive_user_month"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    month = Column(Date, nullable=False)  # First day of the archived month
+    record_count = Column(Integer, nullable=False)
+    first_created_at = Column(DateTime, nullable=False)
+    last_created_at = Column(DateTime, nullable=False)
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed JSON list of rows
+    created_at = Column(DateTime, server_default=func.now())
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String, nullable=False, default="QUEUED")  # QUEUED | RUNNING | DONE | FAILED
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)  # Token of the claim running it; a requeue and reclaim changes it
+    last_error = Column(Text, nullable=True)
+    finished_at = Column(DateTime, nullable=True, index=True)
+    created_at = Column(DateTime, server_default=func.now())
@@ -1,18 +1,25 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Directory filters paged by id
+        Index("ix_users_role_id", "role", "id"),
+        Index("ix_users_team_id", "team", "id"),
+        Index("ix_users_active_id", "is_active", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     office_id = Column(String, unique=True, nullable=False, index=True)
     password_hash = Column(String, nullable=False)
-    email = Column(String, nullable=True)
+    email = Column(String, nullable=True, index=True)
     home_latitude = Column(Float, nullable=True)  # Set during registration
     home_longitude = Column(Float, nullable=True)  # Set during registration
     allowed_radius_m = Column(Integer, default=50)  # 50 meters default
     role = Column(String, default="employee")  # employee or team_lead
+    team = Column(String, nullable=True)
     password_reset_token = Column(String, nullable=True)
     password_reset_expires = Column(DateTime, nullable=True)
     is_active = Column(Boolean, default=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class CheckInRequest(BaseModel):
@@ -32,6 +32,7 @@ class AttendanceResponse(BaseModel):
     distance_from_home: Optional[float]
     is_late_request: bool
     late_request_reason: Optional[str]
+    request_state: Optional[str] = None  # PENDING | ESCALATED | APPROVED | REJECTED | EXPIRED
     approved_by: Optional[int]
     approved_at: Optional[datetime]
     created_at: datetime
@@ -48,3 +49,36 @@ class ApprovalResponse(BaseModel):
     message: str
     attendance_id: int
     status: str
+
+class ApprovalEventResponse(BaseModel):
+    id: int
+    actor_id: Optional[int]
+    from_state: Optional[str]
+    to_state: str
+    comment: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class SyncItem(BaseModel):
+    client_id: str  # Device-generated id, echoed back in the result
+    type: Literal["check_in", "late_request"]
+    client_time: datetime  # When the action happened on the device
+    latitude: float
+    longitude: float
+    reason: Optional[str] = None  # Required for late_request
+
+class SyncBatchRequest(BaseModel):
+    sent_at: datetime  # Device clock when the batch was sent
+    items: List[SyncItem]
+
+class SyncItemResult(BaseModel):
+    client_id: str
+    ok: bool
+    status: Optional[str] = None
+    message: str
+    request_id: Optional[int] = None
+
+class SyncBatchResponse(BaseModel):
+    results: List[SyncItemResult]
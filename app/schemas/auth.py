@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, EmailStr
 
 class LoginRequest(BaseModel):
@@ -11,6 +11,7 @@ class LoginResponse(BaseModel):
     user_id: int
     office_id: str
     role: str
+    sync_key: str  # Signs offline batches sent to /api/attendance/sync
 
 class RegisterRequest(BaseModel):
     office_id: str
@@ -40,9 +41,18 @@ class UserResponse(BaseModel):
     office_id: str
     email: Optional[str]
     role: str
+    team: Optional[str] = None
     home_latitude: Optional[float]
     home_longitude: Optional[float]
     allowed_radius_m: int
+    is_active: bool = True
     
     class Config:
         from_attributes = True
+
+class TeamAssignment(BaseModel):
+    team: Optional[str] = None  # None removes the user from their team
+
+class UserDirectoryPage(BaseModel):
+    items: List[Dict[str, Any]]  # UserResponse fields, or the subset requested with `fields`
+    next_cursor: Optional[str] = None
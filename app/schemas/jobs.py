@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+class JobMetricsResponse(BaseModel):
+    queued: int
+    running: int
+    done: int
+    failed: int
+    lag_seconds: float
+    throughput_per_minute: int
@@ -0,0 +1,207 @@
+import json
+import zlib
+from datetime import date, datetime
+from typing import Iterator, List, Optional
+from sqlalchemy import DateTime, and_, func, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.attendance import Attendance
+from app.models.attendance_archive import AttendanceArchive
+
+ARCHIVE_COLUMNS = [column.name for column in Attendance.__table__.columns]
+DATETIME_COLUMNS = {c.name for c in Attendance.__table__.columns if isinstance(c.type, DateTime)}
+ARCHIVE_USER_BATCH = 500  # Users per archive transaction
+ARCHIVE_FETCH_SIZE = 5000
+
+def _month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def get_archive_cutoff(now: datetime = None) -> datetime:
+    """First moment of the oldest month that stays in the hot table"""
+    if now is None:
+        now = datetime.now()
+    cutoff = _add_months(_month_start(now), -settings.ATTENDANCE_HOT_MONTHS)
+    return datetime(cutoff.year, cutoff.month, 1)
+
+def keyset_before(created_column, id_column, before: datetime, before_id: Optional[int] = None):
+    """Rows older than the (created_at, id) cursor; by created_at alone when no id is given"""
+    if before_id is None:
+        return created_column < before
+    return or_(created_column < before, and_(created_column == before, id_column < before_id))
+
+def _is_before(record: Attendance, before: Optional[datetime], before_id: Optional[int]) -> bool:
+    if before is None:
+        return True
+    if before_id is None:
+        return record.created_at < before
+    return (record.created_at, record.id) < (before, before_id)
+
+def _serialize(record: Attendance) -> dict:
+    row = {}
+    for name in ARCHIVE_COLUMNS:
+        value = getattr(record, name)
+        row[name] = value.isoformat() if isinstance(value, datetime) else value
+    return row
+
+def _deserialize(row: dict) -> Attendance:
+    """Build a detached Attendance from an archived row (never added to a session)"""
+    values = dict(row)
+    for name in DATETIME_COLUMNS:
+        if values.get(name):
+            values[name] = datetime.fromisoformat(values[name])
+    return Attendance(**values)
+
+def _compress(rows: List[dict]) -> bytes:
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode("utf-8"), 9)
+
+def _decompress(payload: bytes) -> List[dict]:
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+def _archive_user_month(db: Session, user_id: int, month: date, records: List[Attendance]):
+    rows = [_serialize(r) for r in records]
+
+    archive = db.query(AttendanceArchive).filter(
+        AttendanceArchive.user_id == user_id,
+        AttendanceArchive.month == month
+    ).first()
+
+    if archive:
+        # Late stragglers (e.g. requests that were still pending) join the existing block
+        rows = _decompress(archive.payload) + rows
+    else:
+        archive = AttendanceArchive(user_id=user_id, month=month)
+        db.add(archive)
+
+    rows.sort(key=lambda row: (row["created_at"], row["id"]))
+    archive.payload = _compress(rows)
+    archive.record_count = len(rows)
+    archive.first_created_at = datetime.fromisoformat(rows[0]["created_at"])
+    archive.last_created_at = datetime.fromisoformat(rows[-1]["created_at"])
+
+def _archive_user_batch(db: Session, month: date, month_begin: datetime, month_end: datetime, user_ids: List[int]) -> Optional[int]:
+    """
+    Archive one month of a range of users in one transaction, streaming their rows
+    user by user. Returns the rows archived, or None if rows changed meanwhile.
+    """
+    in_batch = [
+        Attendance.user_id >= user_ids[0],
+        Attendance.user_id <= user_ids[-1],
+        Attendance.created_at >= month_begin,
+        Attendance.created_at < month_end,
+        Attendance.status != "PENDING"
+    ]
+    rows = db.query(Attendance).filter(*in_batch).order_by(
+        Attendance.user_id, Attendance.created_at
+    ).yield_per(ARCHIVE_FETCH_SIZE)
+
+    archived = 0
+    user_id, user_records = None, []
+    for record in rows:
+        if record.user_id != user_id and user_records:
+            _archive_user_month(db, user_id, month, user_records)
+            user_records = []
+        user_id = record.user_id
+        user_records.append(record)
+        archived += 1
+    if user_records:
+        _archive_user_month(db, user_id, month, user_records)
+
+    deleted = db.query(Attendance).filter(*in_batch).delete(synchronize_session=False)
+    if deleted != archived:
+        # A row was decided or added after it was read: retry the batch
+        db.rollback()
+        return None
+    db.commit()
+    return archived
+
+def archive_closed_months(db: Session, before: datetime = None) -> dict:
+    """
+    Move closed months out of the hot attendance table into compressed cold storage.
+    Each month is archived ARCHIVE_USER_BATCH users per transaction, so memory and
+    statement size stay bounded at any table size. PENDING rows stay hot until decided.
+    """
+    cutoff = before or get_archive_cutoff()
+
+    oldest = db.query(func.min(Attendance.created_at)).filter(
+        Attendance.created_at < cutoff,
+        Attendance.status != "PENDING"
+    ).scalar()
+
+    months = 0
+    archived_rows = 0
+    if oldest is None:
+        return {"months": months, "rows": archived_rows, "cutoff": cutoff}
+
+    month = _month_start(oldest)
+    while month < cutoff.date():
+        month_begin = datetime(month.year, month.month, 1)
+        next_month = _add_months(month, 1)
+        month_end = min(datetime(next_month.year, next_month.month, 1), cutoff)
+
+        month_rows = 0
+        last_user_id = None
+        while True:
+            query = db.query(Attendance.user_id).filter(
+                Attendance.created_at >= month_begin,
+                Attendance.created_at < month_end,
+                Attendance.status != "PENDING"
+            )
+            if last_user_id is not None:
+                query = query.filter(Attendance.user_id > last_user_id)
+            user_ids = [
+                user_id for user_id, in
+                query.distinct().order_by(Attendance.user_id).limit(ARCHIVE_USER_BATCH)
+            ]
+            if not user_ids:
+                break
+
+            archived = _archive_user_batch(db, month, month_begin, month_end, user_ids)
+            if archived is None:
+                continue
+            month_rows += archived
+            last_user_id = user_ids[-1]
+
+        if month_rows:
+            months += 1
+            archived_rows += month_rows
+
+        month = next_month
+
+    return {"months": months, "rows": archived_rows, "cutoff": cutoff}
+
+def iter_archived_attendance(
+    db: Session,
+    user_id: int,
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None
+) -> Iterator[Attendance]:
+    """Yield a user's archived rows newest first, decompressing one month at a time"""
+    query = db.query(AttendanceArchive).filter(AttendanceArchive.user_id == user_id)
+    if before is not None:
+        if before_id is None:
+            query = query.filter(AttendanceArchive.first_created_at < before)
+        else:
+            query = query.filter(AttendanceArchive.first_created_at <= before)
+
+    for archive in query.order_by(AttendanceArchive.month.desc()).yield_per(12):
+        for row in reversed(_decompress(archive.payload)):
+            record = _deserialize(row)
+            if _is_before(record, before, before_id):
+                yield record
+
+if __name__ == "__main__":
+    from app.core.tenancy import get_tenants, tenant_context
+    from app.db.session import get_session_factory
+
+    for tenant in get_tenants().values():
+        with tenant_context(tenant):
+            db = get_session_factory()()
+            try:
+                result = archive_closed_months(db)
+                print(f"[{tenant.id}] Archived {result['rows']} rows from {result['months']} months older than {result['cutoff']:%Y-%m-%d}")
+            finally:
+                db.close()
@@ -1,30 +1,103 @@
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, timedelta
+from itertools import islice
 from app.models.user import User
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app.core.geo import haversine
 from app.core.config import settings
-from app.core.time import check_time
+from app.core.time import check_time, get_check_in_time_window
+from app.core.plausibility import ADVISORY_FLAGS, get_location_scorer
 from app.models.attendance import Attendance
+from app.services.archive_service import get_archive_cutoff, iter_archived_attendance, keyset_before
+from app.services.notifications import attendance_event, publish_change
+from app.services.workflow_service import (
+    LOCATION_FLAG_PREFIX,
+    OFFLINE_HOLD_PREFIX,
+    get_reviewable_request,
+    get_sla_scheduler,
+    open_request,
+    record_opened,
+    transition
+)
 
-def check_in(db: Session, user: User, lat: float, lng: float):
+def _save(db: Session, attendance: Attendance, team: str, type: str, at: datetime, commit: bool) -> dict:
+    """
+    Insert a new attendance row and notify; returns the event payload.
+    Late requests get their opening audit entry and SLA timer.
+    With commit=False the row is only flushed and the caller must commit,
+    then call publish_deferred().
+    """
+    db.add(attendance)
+    db.flush()
+    if attendance.request_state:
+        record_opened(db, attendance, at)
+    event = attendance_event(attendance, at)
+    due_at = attendance.due_at
+    if commit:
+        db.commit()
+        publish_change(team, type, event)
+    else:
+        db.info.setdefault("deferred_events", []).append((team, type, event))
+    if due_at is not None:
+        get_sla_scheduler().schedule(event["id"], due_at)
+    return event
+
+def _remember_fix(db: Session, user_id: int, lat: float, lng: float, at: datetime, commit: bool):
+    """Add a check-in's fix to the scorer's history once the row is committed"""
+    if commit:
+        get_location_scorer().remember(user_id, lat, lng, at)
+    else:
+        db.info.setdefault("deferred_fixes", []).append((user_id, lat, lng, at))
+
+def publish_deferred(db: Session):
+    """Send notifications (and scorer fixes) held back by commit=False calls once the caller has committed"""
+    for team, type, event in db.info.pop("deferred_events", []):
+        publish_change(team, type, event)
+    for user_id, lat, lng, at in db.info.pop("deferred_fixes", []):
+        get_location_scorer().remember(user_id, lat, lng, at)
+
+def check_in(
+    db: Session,
+    user: User,
+    lat: float,
+    lng: float,
+    now: datetime = None,
+    commit: bool = True,
+    sync_client_id: str = None
+):
     """
     Main check-in function following the flowchart logic:
     - If 08:00-09:30: Check GPS, mark PRESENT/ABSENT
     - If after 09:30: Mark ABSENT, enable late request
+    `now` replays a check-in recorded offline at that (client) time. The server
+    cannot verify that time, so such an on-time check-in is held for review.
     """
-    now = datetime.now()
+    recorded_at = now
+    if now is None:
+        now = datetime.now()
     time_state = check_time(now)
     
-    # Check if user already checked in today
-    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    # Check if user already checked in today (or has a check-in or request awaiting review)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     existing_checkin = db.query(Attendance).filter(
         Attendance.user_id == user.id,
-        Attendance.created_at >= today_start
+        Attendance.created_at >= today_start,
+        Attendance.created_at < today_start + timedelta(days=1),
+        Attendance.status.in_(["PRESENT", "PENDING"])
     ).first()
     
-    if existing_checkin and existing_checkin.status == "PRESENT":
+    if existing_checkin and existing_checkin.status == "PENDING":
+        # A retry must not get a fresh score; the open request is the check-in
+        return {
+            "status": "PENDING",
+            "message": "Your check-in for today is awaiting Team Lead review",
+            "distance_from_home": existing_checkin.distance_from_home,
+            "check_in_enabled": False,
+            "can_request_present": False
+        }
+    
+    if existing_checkin:
         return {
             "status": "PRESENT",
             "message": "You have already checked in today",
@@ -43,13 +116,32 @@ def check_in(db: Session, user: User, lat: float, lng: float):
     else:
         distance = None
     
+    # Score the fix against the user's recent movement (spoofed GPS detection)
+    scored = time_state != "BEFORE_WINDOW" and settings.LOCATION_CHECKS_ENABLED
+    location_flags = get_location_scorer().check(user.id, lat, lng, now) if scored else []
+    holding_flags = [flag for flag in location_flags if flag not in ADVISORY_FLAGS]
+    
     # Flowchart logic: 08:00 - 09:30
     if time_state == "ON_TIME":
+        review_reason = None
         if distance is None:
             status = "ABSENT"
             message = "Home location not set. Please contact administrator."
             check_in_enabled = False
         
+        elif distance <= user.allowed_radius_m and holding_flags:
+            # Held like a late request so it shows up in the Team Lead's approvals
+            status = "PENDING"
+            message = "Check-in held for Team Lead review: your location could not be verified."
+            check_in_enabled = False
+            review_reason = f"{LOCATION_FLAG_PREFIX}: {', '.join(location_flags)}"
+        
+        elif distance <= user.allowed_radius_m and recorded_at is not None:
+            status = "PENDING"
+            message = "Offline check-in held for Team Lead review."
+            check_in_enabled = False
+            review_reason = f"{OFFLINE_HOLD_PREFIX} at {recorded_at:%H:%M}"
+        
         elif distance <= user.allowed_radius_m:
             status = "PRESENT"
             message = "Check-in successful! You are marked as present."
@@ -66,10 +158,17 @@ def check_in(db: Session, user: User, lat: float, lng: float):
             latitude=lat,
             longitude=lng,
             distance_from_home=distance,
-            is_late_request=False
+            is_late_request=review_reason is not None,
+            late_request_reason=review_reason,
+            sync_client_id=sync_client_id
         )
-        db.add(attendance)
-        db.commit()
+        if review_reason is not None:
+            open_request(attendance, now)
+        if recorded_at is not None:
+            attendance.created_at = recorded_at
+        _save(db, attendance, user.team, "check_in", now, commit)
+        if scored:
+            _remember_fix(db, user.id, lat, lng, now, commit)
         
         return {
             "status": status,
@@ -90,10 +189,14 @@ def check_in(db: Session, user: User, lat: float, lng: float):
             latitude=lat,
             longitude=lng,
             distance_from_home=distance,
-            is_late_request=False
+            is_late_request=False,
+            sync_client_id=sync_client_id
         )
-        db.add(attendance)
-        db.commit()
+        if recorded_at is not None:
+            attendance.created_at = recorded_at
+        _save(db, attendance, user.team, "check_in", now, commit)
+        if scored:
+            _remember_fix(db, user.id, lat, lng, now, commit)
         
         return {
             "status": status,
@@ -107,7 +210,7 @@ def check_in(db: Session, user: User, lat: float, lng: float):
     else:
          return {
             "status": "BEFORE_WINDOW",
-            "message": f"Check-in window opens at {settings.CHECK_IN_START_HOUR:02d}:{settings.CHECK_IN_START_MINUTE:02d}",
+            "message": f"Check-in window opens at {get_check_in_time_window()[0]:%H:%M}",
             "distance_from_home": distance,
             "check_in_enabled": False,
             "can_request_present": False
@@ -118,10 +221,15 @@ def submit_late_check_in_request(
     user: User, 
     lat: float, 
     lng: float, 
-    reason: str
+    reason: str,
+    now: datetime = None,
+    commit: bool = True,
+    sync_client_id: str = None
 ):
-    """Submit late check-in request (after 09:30)"""
-    now = datetime.now()
+    """Submit late check-in request (after 09:30); `now` replays one recorded offline"""
+    recorded_at = now
+    if now is None:
+        now = datetime.now()
     time_state = check_time(now)
     
     if time_state != "LATE":
@@ -130,10 +238,11 @@ def submit_late_check_in_request(
             detail="Late check-in requests can only be submitted after the check-in window"
         )
     
-    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     existing_request = db.query(Attendance).filter(
         Attendance.user_id == user.id,
         Attendance.created_at >= today_start,
+        Attendance.created_at < today_start + timedelta(days=1),
         Attendance.is_late_request == True,
         Attendance.status == "PENDING"
     ).first()
@@ -160,16 +269,18 @@ def submit_late_check_in_request(
         longitude=lng,
         distance_from_home=distance,
         is_late_request=True,
-        late_request_reason=reason
+        late_request_reason=reason,
+        sync_client_id=sync_client_id
     )
+    open_request(attendance, now)
+    if recorded_at is not None:
+        attendance.created_at = recorded_at
     
-    db.add(attendance)
-    db.commit()
-    db.refresh(attendance)
+    event = _save(db, attendance, user.team, "late_request", now, commit)
     
     return {
         "message": "Late check-in request submitted. Pending Team Lead approval.",
-        "request_id": attendance.id,
+        "request_id": event["id"],
         "status": "PENDING"
     }
 
@@ -184,50 +295,64 @@ def approve_late_check_in(
     if team_lead.role not in ["team_lead", "admin"]:
         raise HTTPException(status_code=403, detail="Only team leads or admins can approve requests")
     
-    attendance = db.query(Attendance).filter(
-        Attendance.id == attendance_id,
-        Attendance.is_late_request == True,
-        Attendance.status == "PENDING"
-    ).first()
-    
-    if not attendance:
-        raise HTTPException(status_code=404, detail="Pending request not found")
+    attendance, employee_team = get_reviewable_request(db, team_lead, attendance_id, open_only=True)
     
+    now = datetime.now()
     if approve:
-        attendance.status = "PRESENT"
-        attendance.approved_by = team_lead.id
-        attendance.approved_at = datetime.now()
+        transition(db, attendance, "APPROVED", now, actor_id=team_lead.id, comment=comment)
         message = "Late check-in request approved. Employee marked as present."
     else:
-        attendance.status = "ABSENT"
-        attendance.approved_by = team_lead.id
-        attendance.approved_at = datetime.now()
-        if comment:
-            attendance.late_request_reason = f"{attendance.late_request_reason}\n[Rejected: {comment}]"
+        transition(db, attendance, "REJECTED", now, actor_id=team_lead.id, comment=comment)
         message = "Late check-in request rejected. Employee remains marked as absent."
     
+    event = attendance_event(attendance, now)
     db.commit()
+    publish_change(employee_team, "approval", event)
     
     return {
         "message": message,
         "attendance_id": attendance_id,
-        "status": attendance.status
+        "status": event["status"]
     }
 
-def get_user_attendance_history(db: Session, user_id: int, limit: int = 30) -> List[Attendance]:
-    """Get user's attendance history"""
-    return db.query(Attendance).filter(
-        Attendance.user_id == user_id
-    ).order_by(Attendance.created_at.desc()).limit(limit).all()
+def get_user_attendance_history(
+    db: Session,
+    user_id: int,
+    limit: int = 30,
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None
+) -> List[Attendance]:
+    """
+    Get user's attendance history, newest first.
+    Pages with `before` and `before_id` (created_at and id of the last row seen),
+    so rows sharing a timestamp are not skipped, and falls through to archived
+    months once the hot table runs out.
+    """
+    query = db.query(Attendance).filter(Attendance.user_id == user_id)
+    if before is not None:
+        query = query.filter(keyset_before(Attendance.created_at, Attendance.id, before, before_id))
+    records = query.order_by(Attendance.created_at.desc(), Attendance.id.desc()).limit(limit).all()
+
+    # Archived rows are all older than the cutoff, so cold storage is only read
+    # when this page runs short or reaches past it (e.g. old PENDING rows kept hot)
+    if len(records) < limit or records[-1].created_at < get_archive_cutoff():
+        archived = islice(iter_archived_attendance(db, user_id, before, before_id), limit)
+        records = sorted(
+            records + list(archived),
+            key=lambda r: (r.created_at, r.id),
+            reverse=True
+        )[:limit]
+
+    return records
 
-def get_pending_approvals(db: Session, team_lead_id: int = None) -> List[Attendance]:
-    """Get all pending late check-in requests"""
+def get_pending_approvals(db: Session, team: str = None) -> List[Attendance]:
+    """Get pending late check-in requests, optionally only for one team"""
     query = db.query(Attendance).filter(
         Attendance.is_late_request == True,
         Attendance.status == "PENDING"
     )
     
-    if team_lead_id:
-        query = query
+    if team:
+        query = query.join(User, User.id == Attendance.user_id).filter(User.team == team)
     
     return query.order_by(Attendance.created_at.desc()).all()
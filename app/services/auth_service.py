@@ -1,9 +1,19 @@
+import base64
+import logging
+import sys
+from typing import List, Optional, Tuple
+from sqlalchemy import or_, and_
 from app.models.user import User
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.http_cache import get_version_store, pending_version_key
+from app.core.tenancy import tenant_setting
 from datetime import datetime, timedelta
 from app.core.security import (verify_password, hash_password, generate_password_reset_token)
+from app.services.job_queue import enqueue, job_handler
+
+logger = logging.getLogger(__name__)
 
 def authenticate(db: Session, office_id: str, password: str):
     """Authenticate user and return user object"""
@@ -23,7 +33,8 @@ def register_user(
     latitude: float, 
     longitude: float,
     email: str = None,
-    role: str = "employee"
+    role: str = "employee",
+    team: str = None
 ):
     """Register a new user with GPS location"""
     existing_user = db.query(User).filter(User.office_id == office_id).first()
@@ -32,11 +43,12 @@ def register_user(
     user = User(
         office_id=office_id,
         password_hash=hash_password(password),
-        email=email,
+        email=email.lower() if email else None,
         home_latitude=latitude,
         home_longitude=longitude,
-        allowed_radius_m=settings.DEFAULT_RADIUS_METERS,
+        allowed_radius_m=tenant_setting("DEFAULT_RADIUS_METERS"),
         role=role,
+        team=team,
         is_active=True
     )
     db.add(user)
@@ -44,19 +56,34 @@ def register_user(
     db.refresh(user)
     return user
 
+def assign_team(db: Session, user_id: int, team: Optional[str]) -> User:
+    """Move a user to `team` (admins only; users cannot pick their own approver)"""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    previous = user.team
+    user.team = team or None
+    db.commit()
+    db.refresh(user)
+    # Their open requests move between the two teams' pending lists
+    get_version_store().bump(pending_version_key(previous), pending_version_key(user.team))
+    return user
+
 def request_password_reset(db: Session, office_id: str, email: str = None):
     """Generate password reset token"""
     user = db.query(User).filter(User.office_id == office_id).first()
     if not user:
         return {"message": "If the office ID exists, a password reset link has been sent."}
     
-    if email and user.email and user.email != email:
+    if email and user.email and user.email != email.lower():
         return {"message": "If the office ID exists, a password reset link has been sent."}
     reset_token = generate_password_reset_token()
     user.password_reset_token = reset_token
     user.password_reset_expires = datetime.utcnow() + timedelta(
         hours=settings.PASSWORD_RESET_TOKEN_EXPIRE_HOURS
     )
+    # Delivery runs on the job queue, committed together with the token
+    enqueue(db, "password_reset_delivery", {"user_id": user.id})
     
     db.commit()
     return {
@@ -80,3 +107,81 @@ def reset_password(db: Session, token: str, new_password: str):
     
     db.commit()
     return {"message": "Password reset successfully"}
+
+DIRECTORY_FIELDS = (
+    "id", "office_id", "email", "role", "team",
+    "home_latitude", "home_longitude", "allowed_radius_m", "is_active"
+)
+
+def encode_cursor(user_id: int) -> str:
+    return base64.urlsafe_b64encode(str(user_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _next_char(char: str) -> str:
+    code = ord(char) + 1
+    return chr(0xE000 if 0xD800 <= code <= 0xDFFF else code)  # Skip surrogates (not encodable)
+
+def _prefix_range(column, prefix: str):
+    """`column LIKE 'prefix%'` as an index-friendly range on any backend"""
+    # Trailing U+10FFFF has no successor: bump the character before it instead
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return column >= prefix
+    return and_(column >= prefix, column < stem[:-1] + _next_char(stem[-1]))
+
+def list_users(
+    db: Session,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    team: Optional[str] = None,
+    search: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of the user directory ordered by id, selecting only `fields`.
+    `search` is a prefix match on office ID, or on email ignoring case (emails are
+    stored lower-cased). Returns (rows, next_cursor).
+    """
+    fields = list(fields or DIRECTORY_FIELDS)
+    unknown = [f for f in fields if f not in DIRECTORY_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in fields:
+        fields.insert(0, "id")
+
+    query = db.query(*[getattr(User, f) for f in fields])
+    if cursor:
+        query = query.filter(User.id > decode_cursor(cursor))
+    if role is not None:
+        query = query.filter(User.role == role)
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+    if team is not None:
+        query = query.filter(User.team == team)
+    if search:
+        query = query.filter(or_(
+            _prefix_range(User.office_id, search),
+            _prefix_range(User.email, search.lower())
+        ))
+
+    rows = query.order_by(User.id).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return [row._asdict() for row in rows[:limit]], next_cursor
+
+@job_handler("password_reset_delivery")
+def deliver_password_reset(db: Session, payload: dict):
+    """Send the current reset token to the user (runs on a background worker)"""
+    user = db.query(User).filter(User.id == payload["user_id"]).first()
+    if not user or not user.password_reset_token:
+        return
+    if user.password_reset_expires and user.password_reset_expires < datetime.utcnow():
+        return
+    # No mail transport is configured yet; this is where it plugs in
+    logger.info("Password reset token ready for office ID %s (email: %s)", user.office_id, user.email or "none")
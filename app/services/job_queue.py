@@ -0,0 +1,256 @@
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.tenancy import current_tenant_id, get_tenants, tenant_context
+from app.db.session import get_background_session_factory
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers: Dict[str, Callable[[Session, dict], None]] = {}
+
+def job_handler(kind: str):
+    """Register a function(db, payload) as the handler for a job kind"""
+    def register(func: Callable[[Session, dict], None]):
+        _handlers[kind] = func
+        return func
+    return register
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: dict,
+    delay_seconds: int = 0,
+    max_attempts: int = None
+) -> Job:
+    """
+    Queue a job in the caller's transaction. Nothing is committed here, so the
+    job becomes visible to workers only if the caller's own changes commit.
+    """
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        status="QUEUED",
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds)
+    )
+    db.add(job)
+    return job
+
+def requeue_stale_jobs(db: Session) -> int:
+    """
+    Return jobs left RUNNING by a crashed worker to the queue. Live workers
+    renew their locks (heartbeat_jobs), so only abandoned jobs are old enough.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    result = db.execute(
+        update(Job)
+        .where(Job.status == "RUNNING", Job.locked_at < stale_before)
+        .values(status="QUEUED", locked_at=None, locked_by=None)
+    )
+    db.commit()
+    return result.rowcount
+
+def heartbeat_jobs(db: Session, lock_tokens: List[str]) -> int:
+    """Renew the locks of jobs this process is still running (by their claim tokens)"""
+    if not lock_tokens:
+        return 0
+    result = db.execute(
+        update(Job)
+        .where(Job.locked_by.in_(lock_tokens), Job.status == "RUNNING")
+        .values(locked_at=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount
+
+def claim_next_job(db: Session) -> Optional[Job]:
+    """
+    Atomically move the oldest due job from QUEUED to RUNNING.
+    The conditional UPDATE makes concurrent workers race safely on any backend.
+    """
+    while True:
+        now = datetime.utcnow()
+        job_id = db.query(Job.id).filter(
+            Job.status == "QUEUED",
+            Job.run_after <= now
+        ).order_by(Job.run_after, Job.id).limit(1).scalar()
+
+        if job_id is None:
+            db.commit()
+            return None
+
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "QUEUED")
+            .values(status="RUNNING", locked_at=now, locked_by=uuid.uuid4().hex, attempts=Job.attempts + 1)
+        ).rowcount
+        db.commit()
+
+        if claimed:
+            return db.query(Job).filter(Job.id == job_id).first()
+
+def _finish(db: Session, job_id: int, lock_token: str, **values) -> bool:
+    """
+    Record a job's outcome only if this claim still holds it; a job requeued as
+    stale and claimed by another worker belongs to that worker now
+    """
+    finished = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == lock_token, Job.status == "RUNNING")
+        .values(locked_at=None, locked_by=None, **values)
+    ).rowcount
+    if not finished:
+        db.rollback()
+        logger.warning("Job %s lost its lock to another worker; result discarded", job_id)
+        return False
+    db.commit()
+    return True
+
+def run_job(db: Session, job: Job) -> bool:
+    """Run one claimed job; on failure it is retried with exponential backoff"""
+    # Read before the handler runs: a rollback would reload them, possibly from another claim
+    job_id, lock_token, kind = job.id, job.locked_by, job.kind
+    attempts, max_attempts = job.attempts, job.max_attempts
+    handler = _handlers.get(kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{kind}'")
+        handler(db, json.loads(job.payload))
+    except Exception as e:
+        db.rollback()
+        last_error = f"{type(e).__name__}: {e}"
+        if attempts >= max_attempts:
+            if _finish(db, job_id, lock_token, status="FAILED", finished_at=datetime.utcnow(), last_error=last_error):
+                logger.error("Job %s (%s) failed permanently: %s", job_id, kind, last_error)
+        else:
+            backoff = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+            run_after = datetime.utcnow() + timedelta(seconds=backoff)
+            if _finish(db, job_id, lock_token, status="QUEUED", run_after=run_after, last_error=last_error):
+                logger.warning("Job %s (%s) failed, retrying in %ss: %s", job_id, kind, backoff, last_error)
+        return False
+
+    # Committed together with the handler's changes, or rolled back with them
+    return _finish(db, job_id, lock_token, status="DONE", finished_at=datetime.utcnow())
+
+def run_pending_jobs(db: Session, limit: int = None) -> int:
+    """Local worker: drain due jobs synchronously in this session (useful in tests and scripts)"""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job(db)
+        if job is None:
+            break
+        run_job(db, job)
+        processed += 1
+    return processed
+
+def get_queue_metrics(db: Session) -> dict:
+    """Queue depth per status, lag of the oldest due job and jobs finished in the last minute"""
+    now = datetime.utcnow()
+    counts = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+
+    oldest_due = db.query(func.min(Job.run_after)).filter(
+        Job.status == "QUEUED",
+        Job.run_after <= now
+    ).scalar()
+
+    finished_last_minute = db.query(func.count(Job.id)).filter(
+        Job.status.in_(["DONE", "FAILED"]),
+        Job.finished_at >= now - timedelta(minutes=1)
+    ).scalar()
+
+    return {
+        "queued": counts.get("QUEUED", 0),
+        "running": counts.get("RUNNING", 0),
+        "done": counts.get("DONE", 0),
+        "failed": counts.get("FAILED", 0),
+        "lag_seconds": (now - oldest_due).total_seconds() if oldest_due else 0.0,
+        "throughput_per_minute": finished_last_minute
+    }
+
+class JobWorker:
+    """
+    Pool of threads that poll every tenant's jobs table in turn, each with its
+    own session, so one tenant's backlog cannot starve the others.
+    A maintenance thread renews the locks of the jobs running here and requeues
+    jobs whose lock expired, i.e. that were abandoned by a crashed process.
+    """
+
+    def __init__(self, workers: int = None, poll_interval: float = None):
+        self.workers = workers if workers is not None else settings.JOB_WORKERS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL_SECONDS
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._running_lock = threading.Lock()
+        self._running: Dict[str, set] = {}  # Tenant id -> lock tokens of jobs running in this process
+
+    def start(self):
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        thread = threading.Thread(target=self._maintain, name="job-maintenance", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            ran = False
+            for tenant in list(get_tenants().values()):
+                with tenant_context(tenant):
+                    ran = self._run_one() or ran
+            if not ran:
+                self._stop.wait(self.poll_interval)
+
+    def _run_one(self) -> bool:
+        db = get_background_session_factory()()
+        tenant_id = current_tenant_id()
+        try:
+            job = claim_next_job(db)
+            if job is not None:
+                lock_token = job.locked_by
+                with self._running_lock:
+                    self._running.setdefault(tenant_id, set()).add(lock_token)
+                try:
+                    run_job(db, job)
+                finally:
+                    with self._running_lock:
+                        self._running[tenant_id].discard(lock_token)
+                return True
+        except Exception:
+            logger.exception("Job worker loop error")
+        finally:
+            db.close()
+        return False
+
+    def _maintain(self):
+        # Renew well within the timeout so a slow pass never lets a live lock expire
+        interval = settings.JOB_LOCK_TIMEOUT_SECONDS / 3
+        while not self._stop.is_set():
+            for tenant in list(get_tenants().values()):
+                with self._running_lock:
+                    lock_tokens = list(self._running.get(tenant.id, ()))
+                with tenant_context(tenant):
+                    db = get_background_session_factory()()
+                    try:
+                        heartbeat_jobs(db, lock_tokens)
+                        requeue_stale_jobs(db)
+                    except Exception:
+                        logger.exception("Job maintenance error")
+                    finally:
+                        db.close()
+            self._stop.wait(interval)
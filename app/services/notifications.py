@@ -0,0 +1,26 @@
+from datetime import datetime
+from app.core.events import get_event_bus, team_channel
+from app.core.http_cache import get_version_store, pending_version_key, user_version_key
+from app.models.attendance import Attendance
+
+def attendance_event(attendance: Attendance, at: datetime) -> dict:
+    """Dashboard delta for one attendance row (built before commit to avoid a reload)"""
+    return {
+        "id": attendance.id,
+        "user_id": attendance.user_id,
+        "status": attendance.status,
+        "request_state": attendance.request_state,
+        "distance_from_home": attendance.distance_from_home,
+        "is_late_request": bool(attendance.is_late_request),
+        "late_request_reason": attendance.late_request_reason,
+        "approved_by": attendance.approved_by,
+        "at": at.isoformat()
+    }
+
+def publish_change(team: str, type: str, data: dict):
+    """Notify dashboards and invalidate cached reads after a committed change"""
+    keys = [user_version_key(data["user_id"])]
+    if data["is_late_request"]:
+        keys += [pending_version_key(team), pending_version_key(None)]
+    get_version_store().bump(*keys)
+    get_event_bus().publish(team_channel(team), type, data)
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy.orm import Session
+from app.core.plausibility import LocationScorer
+from app.models.attendance import Attendance
+
+def score_attendance_history(
+    db: Session,
+    since: datetime = None,
+    until: datetime = None
+) -> List[dict]:
+    """
+    Offline batch mode: replay stored check-ins in time order through a fresh
+    scorer and return the rows that would have been flagged.
+    """
+    query = db.query(
+        Attendance.id,
+        Attendance.user_id,
+        Attendance.latitude,
+        Attendance.longitude,
+        Attendance.created_at
+    ).filter(
+        Attendance.latitude.isnot(None),
+        Attendance.longitude.isnot(None)
+    )
+    if since is not None:
+        query = query.filter(Attendance.created_at >= since)
+    if until is not None:
+        query = query.filter(Attendance.created_at < until)
+
+    scorer = LocationScorer()
+    flagged = []
+    for row in query.order_by(Attendance.created_at, Attendance.id).yield_per(5000):
+        flags = scorer.score(row.user_id, row.latitude, row.longitude, row.created_at)
+        if flags:
+            flagged.append({
+                "attendance_id": row.id,
+                "user_id": row.user_id,
+                "created_at": row.created_at,
+                "flags": flags
+            })
+    return flagged
+
+if __name__ == "__main__":
+    from app.core.tenancy import get_tenants, tenant_context
+    from app.db.session import get_session_factory
+
+    for tenant in get_tenants().values():
+        with tenant_context(tenant):
+            db = get_session_factory()()
+            try:
+                for item in score_attendance_history(db):
+                    print(f"{tenant.id}\t{item['attendance_id']}\t{item['user_id']}\t{item['created_at']:%Y-%m-%d %H:%M}\t{','.join(item['flags'])}")
+            finally:
+                db.close()
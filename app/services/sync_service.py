@@ -0,0 +1,117 @@
+from typing import List
+from datetime import datetime, timedelta
+from app.models.user import User
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.attendance import Attendance
+from app.schemas.attendance import SyncItem
+from app.services.attendance_service import (
+    check_in,
+    submit_late_check_in_request,
+    publish_deferred
+)
+
+def _to_local(value: datetime) -> datetime:
+    """Client timestamps may carry an offset; the server works in naive local time"""
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+def process_sync_batch(db: Session, user: User, sent_at: datetime, items: List[SyncItem]) -> List[dict]:
+    """
+    Apply actions queued on a device while offline, in client-time order and in
+    one transaction. Each action is judged against the check-in window at its
+    own client time, but since that time comes from the device an on-time
+    check-in from the past is held for Team Lead review rather than marked
+    present. Items are idempotent by client_id, so a retried batch is safe.
+    A rejected action does not affect the others.
+    """
+    if len(items) > settings.SYNC_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.SYNC_MAX_ITEMS} items per batch")
+
+    now = datetime.now()
+    sent_at = _to_local(sent_at)
+    drift = abs((now - sent_at).total_seconds())
+    if drift > settings.SYNC_CLOCK_TOLERANCE_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Device clock differs from server by {drift:.0f}s; please correct the device time"
+        )
+
+    oldest_allowed = now - timedelta(hours=settings.SYNC_MAX_AGE_HOURS)
+    results = [None] * len(items)
+    ordered = sorted(enumerate(items), key=lambda pair: _to_local(pair[1].client_time))
+    try:
+        for index, item in ordered:
+            results[index] = _apply_item(db, user, item, now, sent_at, oldest_allowed)
+        db.commit()
+    except Exception:
+        db.rollback()
+        db.info.pop("deferred_events", None)
+        db.info.pop("deferred_fixes", None)
+        raise
+
+    publish_deferred(db)
+    return results
+
+def _apply_item(
+    db: Session,
+    user: User,
+    item: SyncItem,
+    now: datetime,
+    sent_at: datetime,
+    oldest_allowed: datetime
+) -> dict:
+    applied = db.query(Attendance.id, Attendance.status).filter(
+        Attendance.user_id == user.id,
+        Attendance.sync_client_id == item.client_id
+    ).first()
+    if applied:
+        return {
+            "client_id": item.client_id,
+            "ok": True,
+            "status": applied.status,
+            "message": "Already synced",
+            "request_id": applied.id if item.type == "late_request" else None
+        }
+
+    client_time = _to_local(item.client_time)
+    if client_time > sent_at or client_time < oldest_allowed:
+        return {
+            "client_id": item.client_id,
+            "ok": False,
+            "message": "Action time is outside the accepted sync range"
+        }
+    # Actions from within the clock tolerance are as good as live
+    recorded_at = client_time if (now - client_time).total_seconds() > settings.SYNC_CLOCK_TOLERANCE_SECONDS else None
+
+    try:
+        if item.type == "check_in":
+            outcome = check_in(
+                db, user, item.latitude, item.longitude,
+                now=recorded_at, commit=False, sync_client_id=item.client_id
+            )
+            return {
+                "client_id": item.client_id,
+                "ok": outcome["status"] != "BEFORE_WINDOW",
+                "status": outcome["status"],
+                "message": outcome["message"]
+            }
+
+        if not item.reason:
+            raise HTTPException(status_code=400, detail="A reason is required for late check-in requests")
+        outcome = submit_late_check_in_request(
+            db, user, item.latitude, item.longitude, item.reason,
+            now=recorded_at, commit=False, sync_client_id=item.client_id
+        )
+        return {
+            "client_id": item.client_id,
+            "ok": True,
+            "status": outcome["status"],
+            "message": outcome["message"],
+            "request_id": outcome["request_id"]
+        }
+    except HTTPException as e:
+        # Services reject before writing anything, so the rest of the batch is unaffected
+        return {"client_id": item.client_id, "ok": False, "message": e.detail}
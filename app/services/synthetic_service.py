@@ -0,0 +1,401 @@
+"""
+Synthetic organisations, bulk attendance history and request trace replay for
+capacity planning:
+
+    python -m app.services.synthetic_service generate --users 5000 --years 2
+    python -m app.services.synthetic_service trace --out morning.jsonl
+    python -m app.services.synthetic_service replay morning.jsonl --url http://localhost:8000 --speedup 10
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import insert, select
+from app.core.security import create_access_token, derive_sync_key, hash_password
+from app.core.tenancy import DEFAULT_TENANT_ID, current_tenant_id, get_tenants, tenant_context
+from app.core.time import get_check_in_time_window
+from app.db.session import get_session_factory
+from app.models.attendance import Attendance
+from app.models.user import User
+
+# (name, latitude, longitude) that synthetic homes are clustered around
+CITIES = [
+    ("dhaka", 23.8103, 90.4125),
+    ("chattogram", 22.3569, 91.7832),
+    ("khulna", 22.8456, 89.5403),
+    ("sylhet", 24.8949, 91.8687),
+    ("rajshahi", 24.3745, 88.6042),
+]
+# Std deviation of homes around a city centre, in degrees (~5.5 km)
+CITY_SPREAD_DEG = 0.05
+# Std deviation of a check-in fix around home, in degrees (~10 m)
+GPS_JITTER_DEG = 0.0001
+# Minutes relative to the window start; each user gets one as their usual arrival
+SHIFTS = [-20, 0, 15, 30, 60]
+SYNTHETIC_PASSWORD = "synthetic-password"
+INSERT_BATCH = 20_000
+
+def _office_id(prefix: str, index: int) -> str:
+    return f"{prefix}{index:07d}"
+
+def generate_users(
+    db,
+    users: int,
+    team_size: int = 12,
+    prefix: str = "SYN",
+    seed: int = 0
+) -> List[dict]:
+    """
+    Insert `users` synthetic users (plus one admin) in bulk: homes clustered
+    around CITIES, grouped into teams of `team_size` with the first member as
+    team lead. Everyone shares SYNTHETIC_PASSWORD (hashed once).
+    Returns the inserted rows with their ids and usual arrival shift.
+    """
+    rng = random.Random(seed)
+    password_hash = hash_password(SYNTHETIC_PASSWORD)
+    rows = [{
+        "office_id": _office_id(prefix, 0),
+        "password_hash": password_hash,
+        "email": f"{prefix.lower()}-admin@example.com",
+        "home_latitude": CITIES[0][1],
+        "home_longitude": CITIES[0][2],
+        "allowed_radius_m": 50,
+        "role": "admin",
+        "team": None,
+        "is_active": True
+    }]
+    for index in range(1, users + 1):
+        team_index = (index - 1) // team_size
+        city, lat, lng = CITIES[team_index % len(CITIES)]
+        rows.append({
+            "office_id": _office_id(prefix, index),
+            "password_hash": password_hash,
+            "email": f"{prefix.lower()}{index}@example.com",
+            "home_latitude": rng.gauss(lat, CITY_SPREAD_DEG),
+            "home_longitude": rng.gauss(lng, CITY_SPREAD_DEG),
+            "allowed_radius_m": 50,
+            "role": "team_lead" if (index - 1) % team_size == 0 else "employee",
+            "team": f"{city}-{team_index}",
+            "is_active": rng.random() > 0.02
+        })
+
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.execute(insert(User), rows[start:start + INSERT_BATCH])
+    db.commit()
+
+    ids = dict(db.execute(
+        select(User.office_id, User.id).where(User.office_id.like(f"{prefix}%"))
+    ).all())
+    for row in rows:
+        row["id"] = ids[row["office_id"]]
+        row["shift"] = rng.choice(SHIFTS)
+    return rows
+
+def _attendance_rows(
+    users: List[dict],
+    start: date,
+    end: date,
+    seed: int
+) -> Iterator[dict]:
+    """One row per user per working day: mostly on time, some late requests, some no-shows"""
+    rng = random.Random(seed)
+    window_start, window_end = get_check_in_time_window()
+    leads = {u["team"]: u["id"] for u in users if u["role"] == "team_lead"}
+    employees = [u for u in users if u["role"] != "admin"]
+
+    day = start
+    while day < end:
+        if day.weekday() < 5:
+            opens = datetime.combine(day, window_start)
+            closes = datetime.combine(day, window_end)
+            for user in employees:
+                roll = rng.random()
+                if roll < 0.05:
+                    continue  # Absent without a request
+
+                arrival = opens + timedelta(minutes=user["shift"] + rng.gauss(0, 10))
+                if arrival < opens:
+                    arrival = opens + timedelta(seconds=rng.randint(0, 300))
+                lat = rng.gauss(user["home_latitude"], GPS_JITTER_DEG)
+                lng = rng.gauss(user["home_longitude"], GPS_JITTER_DEG)
+                distance = math.hypot(lat - user["home_latitude"], lng - user["home_longitude"]) * 111_000
+                row = {
+                    "user_id": user["id"],
+                    "status": "PRESENT",
+                    "latitude": lat,
+                    "longitude": lng,
+                    "distance_from_home": distance,
+                    "is_late_request": False,
+                    "late_request_reason": None,
+                    "request_state": None,
+                    "approved_by": None,
+                    "approved_at": None,
+                    "created_at": arrival,
+                    "updated_at": arrival
+                }
+                if arrival > closes:
+                    approved = rng.random() < 0.8
+                    decided = arrival + timedelta(minutes=rng.randint(5, 240))
+                    row.update({
+                        "status": "PRESENT" if approved else "ABSENT",
+                        "is_late_request": True,
+                        "late_request_reason": rng.choice(["Traffic", "Doctor appointment", "Power outage"]),
+                        "request_state": "APPROVED" if approved else "REJECTED",
+                        "approved_by": leads.get(user["team"]),
+                        "approved_at": decided,
+                        "updated_at": decided
+                    })
+                yield row
+        day += timedelta(days=1)
+
+def generate_history(db, users: List[dict], years: float, end: date = None, seed: int = 0) -> int:
+    """
+    Bulk-insert `years` of attendance ending at `end` (default today) for the
+    given users with executemany in batches; returns the number of rows.
+    Audit trail rows are not generated for the historical late requests.
+    """
+    end = end or date.today()
+    start = end - timedelta(days=int(365 * years))
+    table = Attendance.__table__
+    total = 0
+    batch = []
+    for row in _attendance_rows(users, start, end, seed):
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            db.execute(table.insert(), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.execute(table.insert(), batch)
+        total += len(batch)
+    db.commit()
+    return total
+
+def synthesize_morning_trace(
+    db,
+    day: date = None,
+    prefix: str = "SYN",
+    poll_seconds: int = 30,
+    seed: int = 0
+) -> List[dict]:
+    """
+    A trace of one morning rush for the synthetic users in the database:
+    every active employee checks in around their usual shift (late ones file
+    a request and then look at their history) while team leads poll pending
+    approvals. Same format as TraceRecorderMiddleware writes.
+    """
+    rng = random.Random(seed)
+    day = day or date.today()
+    window_start, window_end = get_check_in_time_window()
+    opens = datetime.combine(day, window_start)
+    closes = datetime.combine(day, window_end)
+    tenant = current_tenant_id()
+
+    users = db.execute(
+        select(User.id, User.role, User.home_latitude, User.home_longitude)
+        .where(User.office_id.like(f"{prefix}%"), User.is_active.is_(True))
+    ).all()
+
+    entries = []
+    def add(at: datetime, method: str, path: str, user_id: int, body: dict = None):
+        entries.append({
+            "at": at.timestamp(),
+            "method": method,
+            "path": path,
+            "query": "",
+            "content_type": "application/json" if body is not None else None,
+            "body": json.dumps(body) if body is not None else None,
+            "user_id": user_id,
+            "tenant": tenant
+        })
+
+    for user_id, role, home_lat, home_lng in users:
+        if role == "admin" or home_lat is None:
+            continue
+        if role == "team_lead":
+            at = opens - timedelta(minutes=30) + timedelta(seconds=rng.uniform(0, poll_seconds))
+            while at < closes + timedelta(hours=2):
+                add(at, "GET", "/api/attendance/pending-approvals", user_id)
+                at += timedelta(seconds=poll_seconds)
+
+        arrival = opens + timedelta(minutes=rng.choice(SHIFTS) + rng.gauss(0, 10))
+        location = {
+            "latitude": rng.gauss(home_lat, GPS_JITTER_DEG),
+            "longitude": rng.gauss(home_lng, GPS_JITTER_DEG)
+        }
+        add(arrival, "POST", "/api/attendance/check-in", user_id, location)
+        if arrival > closes:
+            add(arrival + timedelta(seconds=rng.uniform(5, 60)), "POST",
+                "/api/attendance/late-check-in-request", user_id, {**location, "reason": "Traffic"})
+        add(arrival + timedelta(seconds=rng.uniform(1, 120)), "GET", "/api/attendance/history", user_id)
+
+    entries.sort(key=lambda e: e["at"])
+    return entries
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def replay_trace(
+    entries: List[dict],
+    base_url: str,
+    speedup: float = 1.0,
+    concurrency: int = 500,
+    timeout: float = 30.0
+) -> dict:
+    """
+    Send the trace to `base_url` open-loop, keeping the recorded gaps divided
+    by `speedup`. Tokens (and sync signatures) are minted locally for the
+    recorded user and tenant, so the target must share this SECRET_KEY.
+    """
+    import httpx
+
+    tokens: Dict[Tuple[Optional[str], int], str] = {}
+    def headers_for(entry: dict) -> dict:
+        headers = {}
+        tenant = entry.get("tenant")
+        if tenant:
+            headers["X-Tenant-ID"] = tenant
+        if entry.get("content_type"):
+            headers["Content-Type"] = entry["content_type"]
+        user_id = entry.get("user_id")
+        if user_id is not None:
+            key = (tenant, user_id)
+            if key not in tokens:
+                tokens[key] = create_access_token(
+                    data={"sub": str(user_id), "tenant": tenant or DEFAULT_TENANT_ID}
+                )
+            headers["Authorization"] = f"Bearer {tokens[key]}"
+            if entry["path"].endswith("/sync") and entry.get("body"):
+                sync_key = derive_sync_key(user_id, tenant or DEFAULT_TENANT_ID)
+                headers["X-Sync-Signature"] = hmac.new(
+                    sync_key.encode("utf-8"), entry["body"].encode("utf-8"), hashlib.sha256
+                ).hexdigest()
+        return headers
+
+    # The SSE stream never ends; replaying it would only hold connections open
+    entries = [e for e in entries if not e["path"].endswith("/events")]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=concurrency)
+    ) as client:
+        async def send(entry: dict):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(
+                        entry["method"],
+                        entry["path"] + (f"?{entry['query']}" if entry.get("query") else ""),
+                        content=entry.get("body"),
+                        headers=headers_for(entry)
+                    )
+                    outcome = str(response.status_code)
+                except httpx.HTTPError as exc:
+                    outcome = type(exc).__name__
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[outcome] = statuses.get(outcome, 0) + 1
+
+        tasks = []
+        first_at = entries[0]["at"] if entries else 0
+        started = time.perf_counter()
+        for entry in entries:
+            delay = (entry["at"] - first_at) / speedup - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(entry)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(entries),
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(entries) / elapsed, 1) if elapsed else 0.0,
+        "statuses": statuses,
+        "p50_ms": round(_percentile(latencies, 0.50), 1),
+        "p95_ms": round(_percentile(latencies, 0.95), 1),
+        "p99_ms": round(_percentile(latencies, 0.99), 1)
+    }
+
+def _read_trace(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    entries.sort(key=lambda e: e["at"])
+    return entries
+
+def _tenant(tenant_id: Optional[str]):
+    """The tenant to write to; --tenant may only be left out when there is just one"""
+    tenants = get_tenants()
+    if tenant_id is None:
+        if len(tenants) > 1:
+            raise ValueError(f"--tenant is required with several tenants ({', '.join(tenants)})")
+        return next(iter(tenants.values()))
+    if tenant_id not in tenants:
+        raise ValueError(f"Unknown tenant {tenant_id!r}")
+    return tenants[tenant_id]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.services.synthetic_service")
+    parser.add_argument("--tenant", help="Tenant id from TENANTS_FILE (required when it lists several)")
+    parser.add_argument("--seed", type=int, default=0)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Insert synthetic users and attendance history")
+    generate.add_argument("--users", type=int, default=1000)
+    generate.add_argument("--team-size", type=int, default=12)
+    generate.add_argument("--years", type=float, default=1.0)
+    generate.add_argument("--prefix", default="SYN", help="Office id prefix (must be unused)")
+
+    trace = commands.add_parser("trace", help="Write a synthetic morning-rush trace for the synthetic users")
+    trace.add_argument("--out", required=True)
+    trace.add_argument("--prefix", default="SYN")
+    trace.add_argument("--poll-seconds", type=int, default=30)
+
+    replay = commands.add_parser("replay", help="Replay a recorded or synthetic trace against a server")
+    replay.add_argument("trace")
+    replay.add_argument("--url", default="http://localhost:8000")
+    replay.add_argument("--speedup", type=float, default=1.0)
+    replay.add_argument("--concurrency", type=int, default=500)
+
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        summary = asyncio.run(replay_trace(_read_trace(args.trace), args.url, args.speedup, args.concurrency))
+        print(json.dumps(summary, indent=2))
+    else:
+        try:
+            tenant = _tenant(args.tenant)
+        except ValueError as e:
+            parser.error(str(e))
+        with tenant_context(tenant):
+            db = get_session_factory()()
+            try:
+                if args.command == "generate":
+                    started = time.perf_counter()
+                    users = generate_users(db, args.users, args.team_size, args.prefix, args.seed)
+                    print(f"Inserted {len(users)} users in {time.perf_counter() - started:.1f}s "
+                          f"(password: {SYNTHETIC_PASSWORD})")
+                    started = time.perf_counter()
+                    rows = generate_history(db, users, args.years, seed=args.seed)
+                    seconds = time.perf_counter() - started
+                    print(f"Inserted {rows} attendance rows in {seconds:.1f}s ({rows / seconds * 60:,.0f} rows/min)")
+                else:
+                    entries = synthesize_morning_trace(db, prefix=args.prefix, poll_seconds=args.poll_seconds, seed=args.seed)
+                    with open(args.out, "w", encoding="utf-8") as f:
+                        for entry in entries:
+                            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                    print(f"Wrote {len(entries)} requests to {args.out}")
+            finally:
+                db.close()
@@ -0,0 +1,320 @@
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.time import get_check_in_time_window
+from app.core.tenancy import current_tenant_id, get_tenants, tenant_context
+from app.db.session import get_background_session_factory
+from app.models.user import User
+from app.models.attendance import Attendance
+from app.models.approval_event import ApprovalEvent
+from app.services.notifications import attendance_event, publish_change
+
+logger = logging.getLogger(__name__)
+
+# Reason prefix of check-ins held by the location plausibility checks
+LOCATION_FLAG_PREFIX = "Location flagged"
+# Reason prefix of on-time check-ins replayed from an offline device
+OFFLINE_HOLD_PREFIX = "Recorded offline"
+
+OPEN_STATES = ("PENDING", "ESCALATED")
+TRANSITIONS = {
+    None: {"PENDING"},
+    "PENDING": {"ESCALATED", "APPROVED", "REJECTED", "EXPIRED"},
+    "ESCALATED": {"APPROVED", "REJECTED", "EXPIRED"},
+}
+# Attendance.status that goes with each request state
+ATTENDANCE_STATUS = {
+    "PENDING": "PENDING",
+    "ESCALATED": "PENDING",
+    "APPROVED": "PRESENT",
+    "REJECTED": "ABSENT",
+    "EXPIRED": "ABSENT",
+}
+
+def _due_at(state: str, now: datetime) -> Optional[datetime]:
+    if state == "PENDING":
+        return now + timedelta(minutes=settings.LATE_REQUEST_ESCALATE_AFTER_MINUTES)
+    if state == "ESCALATED":
+        return now + timedelta(minutes=settings.LATE_REQUEST_EXPIRE_AFTER_MINUTES)
+    return None
+
+def open_request(attendance: Attendance, now: datetime):
+    """Put a new late request in PENDING with its escalation deadline (before insert)"""
+    attendance.request_state = "PENDING"
+    attendance.status = ATTENDANCE_STATUS["PENDING"]
+    attendance.due_at = _due_at("PENDING", now)
+
+def record_opened(db: Session, attendance: Attendance, now: datetime):
+    """First audit entry for a request; needs the flushed attendance id"""
+    db.add(ApprovalEvent(
+        attendance_id=attendance.id,
+        from_state=None,
+        to_state=attendance.request_state,
+        comment=attendance.late_request_reason,
+        created_at=now
+    ))
+
+def transition(
+    db: Session,
+    attendance: Attendance,
+    to_state: str,
+    now: datetime,
+    actor_id: int = None,
+    comment: str = None
+):
+    """Move a request to `to_state`, keeping status and deadline in step, and audit it"""
+    current = attendance.request_state
+    if current is None and attendance.status == "PENDING":
+        current = "PENDING"  # Requests created before the workflow existed
+    if to_state not in TRANSITIONS.get(current, set()):
+        raise HTTPException(status_code=409, detail=f"Cannot move request from {current} to {to_state}")
+
+    attendance.request_state = to_state
+    attendance.status = ATTENDANCE_STATUS[to_state]
+    attendance.due_at = _due_at(to_state, now)
+    if to_state in ("APPROVED", "REJECTED"):
+        attendance.approved_by = actor_id
+        attendance.approved_at = now
+
+    db.add(ApprovalEvent(
+        attendance_id=attendance.id,
+        actor_id=actor_id,
+        from_state=current,
+        to_state=to_state,
+        comment=comment,
+        created_at=now
+    ))
+
+def review_scope(reviewer: User) -> Optional[str]:
+    """
+    Team whose requests `reviewer` may see, or None for all teams (admins only).
+    A team lead without a team sees nothing until an admin assigns one.
+    """
+    if reviewer.role == "admin":
+        return None
+    if not reviewer.team:
+        raise HTTPException(status_code=403, detail="No team assigned; ask an admin to assign one")
+    return reviewer.team
+
+def get_reviewable_request(db: Session, reviewer: User, attendance_id: int, open_only: bool = False):
+    """
+    Load a request with its employee's team for `reviewer`. Team leads only
+    see their team's requests (as on /pending-approvals); admins see all.
+    """
+    scope = review_scope(reviewer)
+    query = db.query(Attendance, User.team).join(User, User.id == Attendance.user_id).filter(
+        Attendance.id == attendance_id,
+        Attendance.is_late_request == True
+    )
+    if open_only:
+        query = query.filter(Attendance.status == "PENDING")
+    row = query.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Pending request not found" if open_only else "Request not found")
+
+    attendance, team = row
+    if scope is not None and team != scope:
+        raise HTTPException(status_code=403, detail="You can only review requests of your own team")
+    return attendance, team
+
+def get_request_audit_trail(db: Session, reviewer: User, attendance_id: int) -> List[ApprovalEvent]:
+    get_reviewable_request(db, reviewer, attendance_id)
+    return db.query(ApprovalEvent).filter(
+        ApprovalEvent.attendance_id == attendance_id
+    ).order_by(ApprovalEvent.id).all()
+
+def _within_radius(attendance: Attendance, user: User) -> bool:
+    return attendance.distance_from_home is not None and attendance.distance_from_home <= user.allowed_radius_m
+
+def _grace_period(attendance: Attendance, user: User) -> bool:
+    _, window_end = get_check_in_time_window()
+    deadline = datetime.combine(attendance.created_at.date(), window_end) + timedelta(
+        minutes=settings.LATE_REQUEST_GRACE_MINUTES
+    )
+    return attendance.created_at <= deadline
+
+# Rules named in LATE_REQUEST_AUTO_APPROVE_RULES; a request is approved if any matches
+AUTO_APPROVAL_RULES: Dict[str, Callable[[Attendance, User], bool]] = {
+    "within_radius": _within_radius,
+    "grace_period": _grace_period,
+}
+
+def apply_auto_approval_rules(db: Session, now: datetime = None) -> int:
+    """
+    Evaluate the configured rules over every PENDING request in one pass and
+    approve the matches in bulk. Held check-ins (location-flagged or recorded
+    offline) are never auto-approved.
+    """
+    rules = [AUTO_APPROVAL_RULES[name] for name in settings.LATE_REQUEST_AUTO_APPROVE_RULES]
+    if not rules:
+        return 0
+    now = now or datetime.now()
+
+    rows = db.query(Attendance, User).join(User, User.id == Attendance.user_id).filter(
+        Attendance.request_state == "PENDING"
+    ).all()
+
+    approved = [
+        (attendance, user) for attendance, user in rows
+        if not (attendance.late_request_reason or "").startswith((LOCATION_FLAG_PREFIX, OFFLINE_HOLD_PREFIX))
+        and any(rule(attendance, user) for rule in rules)
+    ]
+    if not approved:
+        db.commit()
+        return 0
+
+    # Only rows still PENDING are changed (a lead or the SLA timer may have got there
+    # first), so the audit entries and events follow the ids the update returned
+    ids = set(db.scalars(
+        update(Attendance)
+        .where(Attendance.id.in_([attendance.id for attendance, _ in approved]), Attendance.request_state == "PENDING")
+        .values(request_state="APPROVED", status="PRESENT", due_at=None, approved_at=now)
+        .returning(Attendance.id)
+    ).all())
+    approved = [(attendance, user) for attendance, user in approved if attendance.id in ids]
+    db.add_all([
+        ApprovalEvent(attendance_id=i, from_state="PENDING", to_state="APPROVED", comment="Auto-approved by rule", created_at=now)
+        for i in ids
+    ])
+
+    # The bulk update synchronizes the loaded rows, so the events carry the new state
+    events = [(user.team, attendance_event(attendance, now)) for attendance, user in approved]
+    db.commit()
+
+    for team, event in events:
+        publish_change(team, "approval", event)
+    return len(ids)
+
+class SlaScheduler:
+    """
+    In-memory min-heap of request deadlines served by one thread that sleeps
+    until the earliest one, so the table is never polled for due requests.
+    Open requests are loaded once at start; new ones are added by schedule().
+    Claims use conditional updates, so several processes can run schedulers.
+    One scheduler serves every tenant; each deadline remembers its tenant.
+    """
+
+    def __init__(self):
+        self._heap = []  # (due timestamp, tenant id, attendance id)
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._next_rules_at = 0.0
+
+    def schedule(self, attendance_id: int, due_at: datetime):
+        with self._condition:
+            heapq.heappush(self._heap, (due_at.timestamp(), current_tenant_id(), attendance_id))
+            self._condition.notify()
+
+    def start(self):
+        for tenant in get_tenants().values():
+            with tenant_context(tenant):
+                db = get_background_session_factory()()
+                try:
+                    for attendance_id, due_at in db.query(Attendance.id, Attendance.due_at).filter(
+                        Attendance.request_state.in_(OPEN_STATES),
+                        Attendance.due_at.isnot(None)
+                    ).yield_per(10000):
+                        self._heap.append((due_at.timestamp(), tenant.id, attendance_id))
+                finally:
+                    db.close()
+        heapq.heapify(self._heap)
+
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="sla-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _next_wakeup(self) -> float:
+        next_at = self._heap[0][0] if self._heap else float("inf")
+        if settings.LATE_REQUEST_AUTO_APPROVE_RULES:
+            next_at = min(next_at, self._next_rules_at)
+        return next_at
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    delay = self._next_wakeup() - datetime.now().timestamp()
+                    if delay <= 0:
+                        break
+                    self._condition.wait(min(delay, 3600))
+                if self._stopping:
+                    return
+                now = datetime.now().timestamp()
+                due: Dict[str, List[int]] = {}
+                while self._heap and self._heap[0][0] <= now:
+                    _, tenant_id, attendance_id = heapq.heappop(self._heap)
+                    due.setdefault(tenant_id, []).append(attendance_id)
+
+            run_rules = settings.LATE_REQUEST_AUTO_APPROVE_RULES and self._next_rules_at <= now
+            if run_rules:
+                self._next_rules_at = now + settings.LATE_REQUEST_RULES_INTERVAL_SECONDS
+            for tenant in list(get_tenants().values()):
+                if tenant.id not in due and not run_rules:
+                    continue
+                with tenant_context(tenant):
+                    try:
+                        if tenant.id in due:
+                            self.fire(due[tenant.id])
+                        if run_rules:
+                            db = get_background_session_factory()()
+                            try:
+                                apply_auto_approval_rules(db)
+                            finally:
+                                db.close()
+                    except Exception:
+                        logger.exception("SLA scheduler error for tenant %s", tenant.id)
+
+    def fire(self, attendance_ids: List[int], now: datetime = None):
+        """Escalate or expire the current tenant's requests if their deadline has really passed"""
+        now = now or datetime.now()
+        db = get_background_session_factory()()
+        try:
+            rows = db.query(Attendance, User.team).join(User, User.id == Attendance.user_id).filter(
+                Attendance.id.in_(attendance_ids),
+                Attendance.request_state.in_(OPEN_STATES),
+                Attendance.due_at <= now
+            ).all()
+
+            changed = []
+            for attendance, team in rows:
+                # Claim the deadline so a scheduler in another process skips it
+                claimed = db.execute(
+                    update(Attendance)
+                    .where(Attendance.id == attendance.id, Attendance.due_at == attendance.due_at)
+                    .values(due_at=None)
+                ).rowcount
+                if not claimed:
+                    continue
+                to_state = "ESCALATED" if attendance.request_state == "PENDING" else "EXPIRED"
+                transition(db, attendance, to_state, now, comment="SLA deadline passed")
+                changed.append((team, to_state.lower(), attendance_event(attendance, now), attendance.id, attendance.due_at))
+            db.commit()
+        finally:
+            db.close()
+
+        for team, type, event, attendance_id, due_at in changed:
+            if due_at is not None:
+                self.schedule(attendance_id, due_at)
+            publish_change(team, type, event)
+
+_sla_scheduler: SlaScheduler = None
+
+def get_sla_scheduler() -> SlaScheduler:
+    global _sla_scheduler
+    if _sla_scheduler is None:
+        _sla_scheduler = SlaScheduler()
+    return _sla_scheduler
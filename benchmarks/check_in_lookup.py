@@ -0,0 +1,106 @@
+"""
+Check-in lookup benchmark: times the daily duplicate check and the first
+/history page against a synthetic attendance table of a given size, with and
+without the (user_id, created_at) index.
+
+    python -m benchmarks.check_in_lookup --rows 10000000 --database-url sqlite:///bench_10m.db
+    python -m benchmarks.check_in_lookup --rows 100000000 --database-url postgresql://.../bench
+
+The table is generated once per database (reruns reuse it).
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+from app.db.base import Base
+from app.models.attendance import Attendance
+from app.models.user import User
+from app.services.synthetic_service import generate_history, generate_users
+
+WORKING_DAYS_PER_YEAR = 261
+YEARS = 2
+
+def _duplicate_check(db, user_id: int, day: date):
+    # Same query as attendance_service.check_in
+    today_start = datetime.combine(day, datetime.min.time())
+    return db.query(Attendance).filter(
+        Attendance.user_id == user_id,
+        Attendance.created_at >= today_start,
+        Attendance.created_at < today_start + timedelta(days=1)
+    ).first()
+
+def _history_page(db, user_id: int, limit: int = 30):
+    return db.query(Attendance).filter(
+        Attendance.user_id == user_id
+    ).order_by(Attendance.created_at.desc()).limit(limit).all()
+
+def _time(db, func_, args_list) -> dict:
+    timings = []
+    for args in args_list:
+        started = time.perf_counter()
+        func_(db, *args)
+        timings.append((time.perf_counter() - started) * 1000)
+        db.expunge_all()
+    timings.sort()
+    return {
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p99_ms": round(timings[int(len(timings) * 0.99)], 3)
+    }
+
+def run(database_url: str, rows: int, samples: int, seed: int = 0) -> dict:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(seed)
+
+    existing = db.scalar(select(func.count()).select_from(Attendance))
+    if existing < rows:
+        # ~95% attendance per working day over YEARS
+        users = max(1, int(rows / (WORKING_DAYS_PER_YEAR * YEARS * 0.95)))
+        started = time.perf_counter()
+        created = generate_users(db, users, prefix=f"B{seed}-", seed=seed)
+        generated = generate_history(db, created, YEARS, seed=seed)
+        print(f"Generated {generated:,} rows for {users:,} users in {time.perf_counter() - started:.0f}s")
+        db.execute(text("ANALYZE"))
+        db.commit()
+
+    user_ids = db.scalars(select(User.id).where(User.role != "admin")).all()
+    today = date.today()
+    lookups = [
+        (rng.choice(user_ids), today - timedelta(days=rng.randint(0, 365 * YEARS)))
+        for _ in range(samples)
+    ]
+    pages = [(user_id,) for user_id, _ in lookups]
+
+    results = {"rows": db.scalar(select(func.count()).select_from(Attendance))}
+    results["indexed"] = {
+        "duplicate_check": _time(db, _duplicate_check, lookups),
+        "history_page": _time(db, _history_page, pages)
+    }
+
+    # Same queries without the composite index (dropped and rebuilt afterwards)
+    index = next(i for i in Attendance.__table__.indexes if i.name == "ix_attendance_user_created")
+    index.drop(bind=engine)
+    try:
+        results["without_index"] = {
+            "duplicate_check": _time(db, _duplicate_check, lookups[:max(1, samples // 10)]),
+            "history_page": _time(db, _history_page, pages[:max(1, samples // 10)])
+        }
+    finally:
+        index.create(bind=engine)
+        db.close()
+    return results
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.check_in_lookup")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--database-url", default="sqlite:///bench_check_in.db")
+    parser.add_argument("--samples", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.database_url, args.rows, args.samples), indent=2))
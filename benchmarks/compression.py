@@ -0,0 +1,163 @@
+"""
+Compression benchmark: bytes on the wire and CPU per request for a JSON API
+response above COMPRESSION_MINIMUM_SIZE, `/` and a content-hashed asset, each
+requested as identity, gzip and brotli. API responses are compressed per
+request; static files are served from their build-time .gz/.br siblings.
+
+    python -m benchmarks.compression --requests 2000 --frontend frontend
+
+Runs in process against a throwaway SQLite database and a built copy of the
+frontend (a synthetic one when the directory does not exist). CPU time
+includes the test client, which is the same in every mode; compress_ms is
+the compression step alone for API responses (static files cost none).
+Brotli needs the optional brotli package.
+"""
+import os
+import tempfile
+
+_work_dir = tempfile.mkdtemp(prefix="attendance-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_work_dir}/compression.db"
+os.environ["TENANTS_FILE"] = ""
+os.environ["JOB_WORKERS"] = "0"
+os.environ["WORKFLOW_SCHEDULER_ENABLED"] = "false"
+
+import argparse
+import gzip
+import json
+import random
+import shutil
+import time
+
+def _synthetic_frontend(directory: str):
+    """
+    A single-page app of typical size: ~60 KB of script (the app's own source text,
+    which compresses like unminified JS), ~20 KB of CSS and ~8 KB of HTML
+    """
+    os.makedirs(directory)
+    rng = random.Random(0)
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + "/app"
+    script = []
+    for root, _, files in sorted(os.walk(app_dir)):
+        for name in sorted(files):
+            if name.endswith(".py") and sum(map(len, script)) < 60_000:
+                with open(os.path.join(root, name)) as f:
+                    script.append(f"/* {name} */\n" + f.read())
+    with open(os.path.join(directory, "app.js"), "w") as f:
+        f.write("\n".join(script)[:60_000])
+
+    def declaration(prop: str) -> str:
+        if prop in ("color", "background"):
+            return f"{prop}: #{rng.randrange(0xFFFFFF):06x};"
+        return f"{prop}: {rng.randint(0, 480)}px;"
+
+    properties = ["margin", "padding", "color", "background", "border-radius", "font-size", "gap", "width"]
+    rules = "\n".join(
+        f".{rng.choice(['panel', 'card', 'row', 'badge', 'nav', 'form'])}-{i} {{ "
+        + " ".join(declaration(prop) for prop in rng.sample(properties, 4))
+        + " }"
+        for i in range(260)
+    )
+    with open(os.path.join(directory, "style.css"), "w") as f:
+        f.write(rules)
+
+    words = "attendance check-in history approvals team pending present absent late request location office".split()
+    sections = "\n".join(
+        f'<section id="s{i}" class="panel-{rng.randrange(260)}"><h2>{rng.choice(words).title()} {i}</h2>'
+        f'<p>{" ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))}</p></section>'
+        for i in range(40)
+    )
+    with open(os.path.join(directory, "index.html"), "w") as f:
+        f.write(
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Remote Attendance</title>'
+            '<link rel="stylesheet" href="/static/style.css"></head><body>'
+            f'{sections}<script src="/static/app.js"></script></body></html>'
+        )
+
+def _prepare_frontend(source: str) -> str:
+    """Build a copy of `source` (or a synthetic frontend) in the work dir, where the app looks for it"""
+    from app.core.static import build_static
+
+    target = os.path.join(_work_dir, "frontend")
+    if os.path.isdir(source):
+        shutil.copytree(source, target)
+    else:
+        _synthetic_frontend(target)
+    manifest = build_static(target)
+    return manifest.get("app.js") or next(iter(manifest.values()))
+
+def _compress_ms(body: bytes, encoding: str, brotli, settings, rounds: int = 200) -> float:
+    """Server CPU to compress one response at the middleware's settings"""
+    started = time.process_time()
+    for _ in range(rounds):
+        if encoding == "gzip":
+            gzip.compress(body, compresslevel=settings.GZIP_COMPRESS_LEVEL)
+        else:
+            brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    return round((time.process_time() - started) * 1000 / rounds, 3)
+
+def _measure(client, path: str, headers: dict, requests: int) -> dict:
+    wire_bytes = 0
+    encoding = None
+    cpu = time.process_time()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, (path, response.status_code)
+        encoding = response.headers.get("content-encoding", "identity")
+        # Encoded body as sent (the client decompresses .content)
+        wire_bytes += response.num_bytes_downloaded
+    cpu = time.process_time() - cpu
+    return {
+        "encoding": encoding,
+        "bytes_per_request": round(wire_bytes / requests),
+        "cpu_ms_per_request": round(cpu * 1000 / requests, 3)
+    }
+
+def run(requests: int, frontend: str, users: int) -> dict:
+    asset = _prepare_frontend(frontend)
+    os.chdir(_work_dir)
+
+    from fastapi.testclient import TestClient
+    from app.core.compression import brotli
+    from app.core.config import settings
+    from app.core.security import create_access_token
+    from app.db.session import get_session_factory
+    from app.main import app
+    from app.models.user import User
+    from app.services.synthetic_service import generate_users
+
+    db = get_session_factory()()
+    try:
+        created = generate_users(db, users=users, prefix="COMP")
+        admin = db.query(User).filter(User.id == created[0]["id"]).first()
+        admin.role = "admin"
+        db.commit()
+        token = create_access_token(data={"sub": str(admin.id), "tenant": "default"})
+    finally:
+        db.close()
+
+    endpoints = {
+        f"/api/auth/users?limit={users}": {"Authorization": f"Bearer {token}"},
+        "/": {},
+        f"/static/{asset}": {}
+    }
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    results = {"compression_minimum_size": settings.COMPRESSION_MINIMUM_SIZE, "brotli_installed": brotli is not None}
+    with TestClient(app) as client:
+        for path, headers in endpoints.items():
+            results[path] = {
+                encoding: _measure(client, path, {**headers, "Accept-Encoding": encoding}, requests)
+                for encoding in encodings
+            }
+            if path.startswith("/api"):
+                body = client.get(path, headers={**headers, "Accept-Encoding": "identity"}).content
+                for encoding in encodings[1:]:
+                    results[path][encoding]["compress_ms"] = _compress_ms(body, encoding, brotli, settings)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compression")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--frontend", default="frontend", help="Frontend directory to build and serve")
+    parser.add_argument("--users", type=int, default=200, help="Users on the directory page (the JSON payload)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, os.path.abspath(args.frontend), args.users), indent=2))
@@ -0,0 +1,110 @@
+"""
+Polling benchmark: bytes on the wire, queries and CPU per poll of /history and
+/pending-approvals for a client that ignores ETags, one that revalidates with
+body-hash ETags (RESPONSE_VERSIONING off) and one served by version counters
+(RESPONSE_VERSIONING on), with and without gzip.
+
+    python -m benchmarks.polling --polls 2000 --pending 200
+
+Runs in process against a throwaway SQLite database; CPU time therefore
+includes the test client, which is the same in every mode.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="attendance-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/polling.db"
+os.environ["TENANTS_FILE"] = ""
+os.environ["JOB_WORKERS"] = "0"
+os.environ["WORKFLOW_SCHEDULER_ENABLED"] = "false"
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.profiling import capture_queries
+from app.db.session import get_session_factory
+from app.main import app
+from app.models.attendance import Attendance
+from app.services.synthetic_service import generate_history, generate_users
+
+def _seed(pending: int) -> dict:
+    db = get_session_factory()()
+    try:
+        users = generate_users(db, users=pending, team_size=pending + 1, prefix="POLL")
+        generate_history(db, users, years=1)
+        lead = next(u for u in users if u["role"] == "team_lead")
+        employee = next(u for u in users if u["role"] == "employee")
+        now = datetime.now()
+        db.add_all([
+            Attendance(
+                user_id=u["id"],
+                status="PENDING",
+                latitude=u["home_latitude"],
+                longitude=u["home_longitude"],
+                distance_from_home=5.0,
+                is_late_request=True,
+                late_request_reason="Traffic",
+                request_state="PENDING",
+                created_at=now - timedelta(minutes=i)
+            )
+            for i, u in enumerate(users) if u["role"] == "employee"
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    def headers(user):
+        token = create_access_token(data={"sub": str(user["id"]), "tenant": "default"})
+        return {"Authorization": f"Bearer {token}"}
+    return {"/api/attendance/history": headers(employee), "/api/attendance/pending-approvals": headers(lead)}
+
+def _poll(client: TestClient, path: str, headers: dict, polls: int, revalidate: bool) -> dict:
+    etag = None
+    wire_bytes = 0
+    not_modified = 0
+    with capture_queries() as stats:
+        cpu = time.process_time()
+        for _ in range(polls):
+            request_headers = dict(headers)
+            if revalidate and etag:
+                request_headers["If-None-Match"] = etag
+            response = client.get(path, headers=request_headers)
+            etag = response.headers.get("etag")
+            not_modified += response.status_code == 304
+            # Encoded body as sent (the client decompresses .content) plus headers
+            wire_bytes += response.num_bytes_downloaded + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        cpu = time.process_time() - cpu
+    return {
+        "bytes_per_poll": round(wire_bytes / polls),
+        "queries_per_poll": round(stats.count / polls, 2),
+        "cpu_ms_per_poll": round(cpu * 1000 / polls, 3),
+        "not_modified": not_modified
+    }
+
+def run(polls: int, pending: int) -> dict:
+    endpoints = _seed(pending)
+    results = {}
+    with TestClient(app) as client:
+        for path, headers in endpoints.items():
+            for encoding in ("identity", "gzip"):
+                modes = {}
+                for mode, versioning, revalidate in (
+                    ("no_etag", False, False),
+                    ("body_etag", False, True),
+                    ("versioned", True, True),
+                ):
+                    settings.RESPONSE_VERSIONING = versioning
+                    modes[mode] = _poll(client, path, {**headers, "Accept-Encoding": encoding}, polls, revalidate)
+                results[f"{path} ({encoding})"] = modes
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.polling")
+    parser.add_argument("--polls", type=int, default=1000)
+    parser.add_argument("--pending", type=int, default=200, help="Open late requests in the lead's team")
+    args = parser.parse_args()
+    print(json.dumps(run(args.polls, args.pending), indent=2))
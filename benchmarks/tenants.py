@@ -0,0 +1,237 @@
+"""
+Multi-tenant benchmark over 50 tenants, one SQLite database each:
+
+* background: engines created and request engines evicted while job worker,
+  job maintenance and SLA rules passes walk every tenant, once through the
+  request engine cache (the old path) and once over background connections
+* noisy_neighbour: /api/auth/me latency for the quiet tenants while one
+  tenant's database is locked and its clients keep --noisy requests in
+  flight, with and without TENANT_MAX_CONCURRENT_REQUESTS (and with no noisy
+  tenant as the baseline)
+
+    python -m benchmarks.tenants --tenants 50 --seconds 20 --noisy 100
+
+Runs a real uvicorn server in process against throwaway databases.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="attendance-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/default.db"
+os.environ["TENANTS_FILE"] = ""
+os.environ["JOB_WORKERS"] = "0"
+os.environ["WORKFLOW_SCHEDULER_ENABLED"] = "false"
+
+import argparse
+import asyncio
+import json
+import socket
+import sqlite3
+import threading
+import time
+from unittest import mock
+import httpx
+import uvicorn
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.core.tenancy import load_tenants, tenant_context
+from app.db import session
+from app.main import app
+from app.models.user import User
+from app.services import job_queue, workflow_service
+from app.services.job_queue import JobWorker, heartbeat_jobs, requeue_stale_jobs
+from app.services.workflow_service import apply_auto_approval_rules
+
+def _setup_tenants(count: int) -> list:
+    tenants = [
+        {"id": f"t{index:02d}", "database_url": f"sqlite:///{_db_dir}/t{index:02d}.db"}
+        for index in range(count)
+    ]
+    path = os.path.join(_db_dir, "tenants.json")
+    with open(path, "w") as f:
+        json.dump(tenants, f)
+    settings.TENANTS_FILE = path
+    return list(load_tenants(path).values())
+
+def _background_passes(tenants: list, passes: int):
+    worker = JobWorker(workers=0)
+    for _ in range(passes):
+        for tenant in tenants:
+            with tenant_context(tenant):
+                worker._run_one()
+        for tenant in tenants:
+            with tenant_context(tenant):
+                db = job_queue.get_background_session_factory()()
+                try:
+                    heartbeat_jobs(db, [])
+                    requeue_stale_jobs(db)
+                finally:
+                    db.close()
+        for tenant in tenants:
+            with tenant_context(tenant):
+                db = workflow_service.get_background_session_factory()()
+                try:
+                    apply_auto_approval_rules(db)
+                finally:
+                    db.close()
+
+def _background(tenants: list, passes: int, through_request_cache: bool) -> dict:
+    cache = session.TenantEngineCache(settings.TENANT_ENGINE_CACHE_SIZE)
+    cache._schema_ready = set(session._engine_cache._schema_ready)  # Tables already exist
+    created = []
+    create_engine = cache._create_engine
+
+    def counting_create_engine(tenant, pooled=True):
+        created.append(tenant.id)
+        return create_engine(tenant, pooled)
+
+    cache._create_engine = counting_create_engine
+
+    with mock.patch.object(session, "_engine_cache", cache):
+        # Tenants with live traffic: their request engines fill the cache
+        live = tenants[:settings.TENANT_ENGINE_CACHE_SIZE]
+        live_factories = {}
+        for tenant in live:
+            with tenant_context(tenant):
+                live_factories[tenant.id] = session.get_session_factory()
+        created.clear()
+
+        patches = []
+        if through_request_cache:
+            patches = [
+                mock.patch.object(job_queue, "get_background_session_factory", session.get_session_factory),
+                mock.patch.object(workflow_service, "get_background_session_factory", session.get_session_factory)
+            ]
+        for patch in patches:
+            patch.start()
+        try:
+            started = time.perf_counter()
+            _background_passes(tenants, passes)
+            elapsed = time.perf_counter() - started
+        finally:
+            for patch in patches:
+                patch.stop()
+
+        evicted = sum(cache._factories.get(tenant_id) is not factory for tenant_id, factory in live_factories.items())
+    for factory in list(cache._factories.values()) + list(cache._background.values()):
+        if factory.kw["bind"] is not session.engine:
+            factory.kw["bind"].dispose()
+    return {
+        "engines_created": len(created),
+        "request_engines_evicted": evicted,
+        "ms_per_pass": round(elapsed * 1000 / passes, 1)
+    }
+
+def _seed_users(tenants: list) -> dict:
+    tokens = {}
+    for tenant in tenants:
+        with tenant_context(tenant):
+            db = session.get_session_factory()()
+            try:
+                user = User(office_id=f"{tenant.id}-bench", password_hash="-", role="employee")
+                db.add(user)
+                db.commit()
+                tokens[tenant.id] = create_access_token(data={"sub": str(user.id), "tenant": tenant.id})
+            finally:
+                db.close()
+    return tokens
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def _load(base_url: str, tokens: dict, noisy_tenant: str, noisy: int, seconds: float) -> dict:
+    quiet_latencies = []
+    statuses = {"quiet": {}, "noisy": {}}
+    deadline = time.perf_counter() + seconds
+
+    async def loop(client, tenant_id, kind):
+        headers = {"X-Tenant-ID": tenant_id, "Authorization": f"Bearer {tokens[tenant_id]}"}
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = (await client.get("/api/auth/me", headers=headers)).status_code
+            except httpx.HTTPError:
+                status = "error"
+            if kind == "quiet":
+                quiet_latencies.append((time.perf_counter() - started) * 1000)
+            statuses[kind][status] = statuses[kind].get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        tasks = [loop(client, noisy_tenant, "noisy") for _ in range(noisy)]
+        tasks += [loop(client, tenant_id, "quiet") for tenant_id in tokens if tenant_id != noisy_tenant]
+        await asyncio.gather(*tasks)
+
+    quiet_latencies.sort()
+    return {
+        "quiet_requests": len(quiet_latencies),
+        "quiet_p50_ms": round(quiet_latencies[len(quiet_latencies) // 2], 1),
+        "quiet_p99_ms": round(quiet_latencies[int(len(quiet_latencies) * 0.99)], 1),
+        "quiet_max_ms": round(quiet_latencies[-1], 1),
+        "quiet_statuses": statuses["quiet"],
+        "noisy_statuses": statuses["noisy"]
+    }
+
+def _noisy_neighbour(tenants: list, noisy: int, seconds: float, limit: int) -> dict:
+    tokens = _seed_users(tenants)
+    noisy_tenant = tenants[0]
+    settings.TENANT_MAX_CONCURRENT_REQUESTS = limit
+    app.middleware_stack = None  # Fresh per-tenant slots
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="critical"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    # Hold the noisy tenant's database so each of its requests waits out the busy timeout
+    lock = sqlite3.connect(noisy_tenant.database_url[len("sqlite:///"):], isolation_level=None)
+    lock.execute("BEGIN EXCLUSIVE")
+    try:
+        return asyncio.run(_load(f"http://127.0.0.1:{port}", tokens, noisy_tenant.id, noisy, seconds))
+    finally:
+        lock.execute("ROLLBACK")
+        lock.close()
+        server.should_exit = True
+        thread.join()
+        for tenant in tenants:
+            with tenant_context(tenant):
+                db = session.get_session_factory()()
+                try:
+                    db.query(User).delete()
+                    db.commit()
+                finally:
+                    db.close()
+
+def run(tenant_count: int, passes: int, noisy: int, seconds: float) -> dict:
+    tenants = _setup_tenants(tenant_count)
+    for tenant in tenants:
+        with tenant_context(tenant):
+            session.get_session_factory()  # Create every tenant's tables up front
+
+    limit = settings.TENANT_MAX_CONCURRENT_REQUESTS
+    return {
+        "tenants": tenant_count,
+        "engine_cache_size": settings.TENANT_ENGINE_CACHE_SIZE,
+        "background": {
+            "request_cache": _background(tenants, passes, through_request_cache=True),
+            "background_connections": _background(tenants, passes, through_request_cache=False)
+        },
+        "noisy_neighbour": {
+            "no_noisy_tenant": _noisy_neighbour(tenants, 0, seconds, limit=0),
+            "unlimited": _noisy_neighbour(tenants, noisy, seconds, limit=0),
+            f"limit_{limit}": _noisy_neighbour(tenants, noisy, seconds, limit=limit)
+        }
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.tenants")
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--passes", type=int, default=5, help="Background loop passes over every tenant")
+    parser.add_argument("--noisy", type=int, default=100, help="Requests the noisy tenant keeps in flight")
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.tenants, args.passes, args.noisy, args.seconds), indent=2))
@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+# Settings are read at import time: point the app at a throwaway database with
+# no background threads before anything imports it
+_db_dir = tempfile.mkdtemp(prefix="attendance-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ["TENANTS_FILE"] = ""
+os.environ["JOB_WORKERS"] = "0"
+os.environ["WORKFLOW_SCHEDULER_ENABLED"] = "false"
+os.environ["LOCATION_CHECKS_ENABLED"] = "false"
+
+import itertools
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import get_session_factory
+from app.services import attendance_service
+
+_office_ids = itertools.count(1)
+
+@pytest.fixture(scope="session")
+def client():
+    # The tenant engine is created (with its schema check) on first use; do it
+    # here so it does not count against the first test's query budget
+    get_session_factory()
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def user(client):
+    """A freshly registered employee with its login response"""
+    office_id = f"T{next(_office_ids):05d}"
+    payload = {
+        "office_id": office_id,
+        "password": "test-password",
+        "email": f"{office_id.lower()}@example.com",
+        "latitude": 23.8103,
+        "longitude": 90.4125
+    }
+    assert client.post("/api/auth/register", json=payload).status_code == 201
+    login = client.post("/api/auth/login", json={"office_id": office_id, "password": "test-password"}).json()
+    return {**payload, "headers": {"Authorization": f"Bearer {login['access_token']}"}}
+
+@pytest.fixture
+def on_time(monkeypatch):
+    """Freeze the check-in clock inside today's window, whatever the wall clock says"""
+    frozen = datetime.combine(datetime.now().date(), datetime.min.time()).replace(hour=8, minute=30)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return frozen
+
+    monkeypatch.setattr(attendance_service, "datetime", FrozenDatetime)
+    return frozen
@@ -0,0 +1,43 @@
+from app.db.profiling import assert_max_queries
+
+CHECK_IN = {"latitude": 23.8103, "longitude": 90.4125}
+
+def test_register_budget(client):
+    payload = {
+        "office_id": "BUDGET-REGISTER",
+        "password": "test-password",
+        "email": "budget-register@example.com",
+        "latitude": 23.8103,
+        "longitude": 90.4125
+    }
+    # Duplicate office id check + insert + refresh for the response
+    with assert_max_queries(3):
+        response = client.post("/api/auth/register", json=payload)
+    assert response.status_code == 201
+
+def test_login_budget(client, user):
+    with assert_max_queries(1):
+        response = client.post("/api/auth/login", json={"office_id": user["office_id"], "password": "test-password"})
+    assert response.status_code == 200
+
+def test_me_budget(client, user):
+    with assert_max_queries(1):
+        response = client.get("/api/auth/me", headers=user["headers"])
+    assert response.status_code == 200
+
+def test_check_in_budget(client, user, on_time):
+    # User + today's duplicate check + insert
+    with assert_max_queries(3):
+        response = client.post("/api/attendance/check-in", json=CHECK_IN, headers=user["headers"])
+    assert response.json()["status"] == "PRESENT"
+
+    with assert_max_queries(2):
+        response = client.post("/api/attendance/check-in", json=CHECK_IN, headers=user["headers"])
+    assert response.json()["message"] == "You have already checked in today"
+
+def test_history_budget(client, user, on_time):
+    client.post("/api/attendance/check-in", json=CHECK_IN, headers=user["headers"])
+    # User + hot rows + archived months (the page is short)
+    with assert_max_queries(3):
+        response = client.get("/api/attendance/history", headers=user["headers"])
+    assert len(response.json()) == 1